@@ -0,0 +1,325 @@
+import codecs
+
+from bs4 import BeautifulSoup, Tag
+from lxml import etree
+
+# lxml строит дерево на C и ищет по XPath; bs4 - исходный эталонный разбор
+# (html.parser и однопроходный extract_from_soup), выбирается --engine bs4
+ENGINES = ('lxml', 'bs4')
+DEFAULT_ENGINE = 'lxml'
+
+# Строки внутри этих тегов BeautifulSoup не включает в get_text()
+_SKIP_TEXT_TAGS = {'script', 'style', 'template', 'rt', 'rp'}
+
+_CONTAINER_XPATH = etree.XPath("(//div[contains(@class, 'articlePage')])[1]")
+_PARAGRAPHS_XPATH = etree.XPath(".//p[not(ancestor::*[@data-test='contextual-subscription-hook'])]")
+_RELATED_XPATH = etree.XPath("(//div[@data-test='related-instruments-section'])[1]")
+_RELATED_ITEMS_XPATH = etree.XPath(".//div[contains(concat(' ', normalize-space(@class), ' '), ' relative ')]")
+_RELATED_LINK_XPATH = etree.XPath("(.//a[@href])[1]")
+_RELATED_TICKER_XPATH = etree.XPath("(.//span)[1]")
+_AUTHOR_XPATH = etree.XPath("//span[. = 'Author']")
+_NEXT_LINK_XPATH = etree.XPath("(descendant::a | following::a)[1]")
+# Грубый отбор кандидатов, точное сравнение делается в Python как в исходном коде
+_DATE_LABELS_XPATH = etree.XPath(
+    "//span[contains(translate(., 'ABDEHILPSTU \t\r\n', 'abdehilpstu'), 'published')"
+    " or contains(translate(., 'ABDEHILPSTU \t\r\n', 'abdehilpstu'), 'updated')]"
+)
+_NEXT_SPAN_XPATH = etree.XPath("following-sibling::span[1]")
+
+
+def parse_article(html, engine=DEFAULT_ENGINE):
+    """Разбор страницы статьи: (content, related, author, published, updated) или None"""
+    if engine == 'bs4':
+        return _parse_bs4(html)
+    return _parse_lxml(html)
+
+
+class ParsePool:
+    """Разбор страниц в пуле процессов
+
+    Разбор упирается в процессор и держит GIL, поэтому в одном процессе
+    потоки загрузки делят одно ядро; пул разносит разбор по ядрам, а потоки
+    загрузки только ждут результат.
+    """
+
+    def __init__(self, workers=None, engine=DEFAULT_ENGINE):
+        # Импорт здесь: без --parse-workers multiprocessing при запуске не нужен
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.engine = engine
+        # Не fork: процесс уже с потоками, их блокировки в копии могут остаться занятыми
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+    def parse(self, html, engine=None):
+        """То же, что parse_article, но в одном из процессов пула"""
+        return self._executor.submit(parse_article, html, engine or self.engine).result()
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+class ArticleStream:
+    """Следит за страницей статьи, которая приходит по кускам
+
+    feed(chunk) возвращает True, как только целиком получены контейнер
+    articlePage, блок связанных инструментов, автор со ссылкой и блок с датами
+    Published/Updated - все, что берет parse_article. Дальше страницу можно не
+    качать: разбор полученного начала (html) дает тот же результат. Если на
+    странице чего-то из этого нет, True не вернется и страница дочитывается.
+    Пары Published и Updated на investing.com лежат в соседних div, поэтому
+    блок дат считается полученным, когда закрылся родитель пары Published и
+    после Published уже встретилась подпись Updated, а если нет - когда
+    закрылся родитель этого родителя.
+    """
+
+    def __init__(self, encoding=None):
+        self.encoding = encoding or 'utf-8'
+        self.received = 0
+        self.done = False
+        self._chunks = []
+        self._parser = etree.HTMLPullParser(events=('start', 'end'), encoding=self.encoding)
+        self._container = None
+        self._related = None
+        self._author_span = None
+        self._author_link = None
+        self._dates_pair = None
+        self._dates_block = None
+        self._updated_label = False
+        self._seen = set()
+
+    def feed(self, chunk):
+        self._chunks.append(chunk)
+        self.received += len(chunk)
+        self._parser.feed(chunk)
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                self._on_start(element)
+            else:
+                self._on_end(element)
+        self.done = self._seen >= {'container', 'related', 'author', 'dates'}
+        return self.done
+
+    def _on_start(self, element):
+        if element.tag == 'div':
+            if self._container is None and 'articlePage' in (element.get('class') or ''):
+                self._container = element
+            elif self._related is None and element.get('data-test') == 'related-instruments-section':
+                self._related = element
+        elif element.tag == 'a' and self._author_span is not None and self._author_link is None:
+            # following::a - первая ссылка, начавшаяся после подписи Author
+            self._author_link = element
+
+    def _on_end(self, element):
+        if element is self._container:
+            self._seen.add('container')
+        elif element is self._related:
+            self._seen.add('related')
+        elif element is self._author_link:
+            self._seen.add('author')
+        elif element is self._dates_block:
+            parent = element.getparent()
+            if self._updated_label or parent is None or self._dates_block is not self._dates_pair:
+                self._seen.add('dates')
+            else:
+                # Updated может быть в соседнем div - ждем, пока закроется общий для них блок
+                self._dates_block = parent
+        elif element.tag == 'span':
+            if self._author_span is None and _single_string(element) == 'Author':
+                self._author_span = element
+                if element.find('.//a') is not None:
+                    self._seen.add('author')
+            elif self._dates_block is None:
+                if _stripped_text(element).lower() == 'published':
+                    self._dates_pair = self._dates_block = element.getparent()
+            elif not self._updated_label and _stripped_text(element).lower() == 'updated':
+                # Считаем только подпись после Published: более ранняя может быть не из блока дат
+                self._updated_label = True
+
+    @property
+    def content(self):
+        """Полученная часть страницы байтами"""
+        return b''.join(self._chunks)
+
+    @property
+    def html(self):
+        """Полученная часть страницы текстом; оборванный на границе символ отбрасывается"""
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        return decoder.decode(self.content, final=not self.done)
+
+
+def _stripped_text(element):
+    """Аналог BeautifulSoup get_text(strip=True) для элемента lxml"""
+    parts = []
+
+    def walk(node):
+        if node.text:
+            text = node.text.strip()
+            if text:
+                parts.append(text)
+        for child in node:
+            # Комментарии и служебные теги пропускаем, но их хвостовой текст принадлежит родителю
+            if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+                walk(child)
+            if child.tail:
+                text = child.tail.strip()
+                if text:
+                    parts.append(text)
+
+    walk(element)
+    return ''.join(parts)
+
+
+def _single_string(element):
+    """Аналог BeautifulSoup .string: текст единственного потомка или None"""
+    while True:
+        children = list(element)
+        if not children:
+            return element.text
+        if element.text or len(children) != 1 or children[0].tail:
+            return None
+        element = children[0]
+        if not isinstance(element.tag, str):
+            return None
+
+
+def _parse_lxml(html):
+    if not html:
+        return None
+    parser = etree.HTMLParser(encoding='utf-8')
+    root = etree.fromstring(html.encode('utf-8'), parser)
+    if root is None:
+        return None
+    containers = _CONTAINER_XPATH(root)
+    if not containers:
+        return None
+
+    paragraphs = []
+    for p in _PARAGRAPHS_XPATH(containers[0]):
+        text = _stripped_text(p)
+        if text:
+            paragraphs.append(text)
+    content = '\n'.join(paragraphs)
+
+    # Связанные инструменты
+    related = []
+    for section in _RELATED_XPATH(root):
+        for rel in _RELATED_ITEMS_XPATH(section):
+            links = _RELATED_LINK_XPATH(rel)
+            tickers = _RELATED_TICKER_XPATH(rel)
+            if links and tickers:
+                related.append({
+                    'url': links[0].get('href'),
+                    'ticker': _stripped_text(tickers[0])
+                })
+
+    # Автор
+    author = None
+    for span in _AUTHOR_XPATH(root):
+        if _single_string(span) == 'Author':
+            author_links = _NEXT_LINK_XPATH(span)
+            if author_links:
+                author = _stripped_text(author_links[0])
+            break
+
+    # Время публикации и апдейта (как и раньше, побеждает последнее совпадение)
+    published = None
+    updated = None
+    for span in _DATE_LABELS_XPATH(root):
+        label = _stripped_text(span).lower()
+        if label in ('published', 'updated'):
+            next_spans = _NEXT_SPAN_XPATH(span)
+            if next_spans:
+                if label == 'published':
+                    published = _stripped_text(next_spans[0])
+                else:
+                    updated = _stripped_text(next_spans[0])
+
+    return content, related, author, published, updated
+
+
+def _parse_bs4(html):
+    return extract_from_soup(BeautifulSoup(html, 'html.parser'))
+
+
+def _span_text_is(span, labels, max_len):
+    """span.get_text(strip=True).lower() in labels, без сборки длинного текста"""
+    parts = []
+    length = 0
+    for text in span.stripped_strings:
+        length += len(text)
+        if length > max_len:
+            return None
+        parts.append(text)
+    label = ''.join(parts).lower()
+    return label if label in labels else None
+
+
+def extract_from_soup(soup):
+    """Извлечение полей статьи из дерева BeautifulSoup за один обход"""
+    article_container = None
+    related_section = None
+    related = []
+    paragraphs = []
+    author_block = None
+    author = None
+    published = None
+    updated = None
+
+    # Стек (узел, внутри контейнера статьи, внутри блока подписки, внутри связанных инструментов)
+    stack = [(soup, False, False, False)]
+    while stack:
+        node, in_container, in_hook, in_related = stack.pop()
+        name = node.name
+        child_container, child_hook, child_related = in_container, in_hook, in_related
+
+        if author_block is not None and author is None and name == 'a':
+            # Первая ссылка после блока автора (аналог find_next('a'))
+            author = node.get_text(strip=True)
+
+        if name == 'div':
+            classes = node.get('class') or []
+            if article_container is None and any('articlePage' in c for c in classes):
+                article_container = node
+                child_container = True
+            if related_section is None and node.get('data-test') == 'related-instruments-section':
+                related_section = node
+                child_related = True
+            elif in_related and 'relative' in classes:
+                a = node.find('a', href=True)
+                ticker = node.find('span')
+                if a and ticker:
+                    related.append({
+                        'url': a['href'],
+                        'ticker': ticker.get_text(strip=True)
+                    })
+        elif name == 'p':
+            if in_container and not in_hook:
+                text = node.get_text(strip=True)
+                if text:
+                    paragraphs.append(text)
+        elif name == 'span':
+            if author_block is None and node.string == 'Author':
+                author_block = node
+            label = _span_text_is(node, ('published', 'updated'), 9)
+            if label:
+                next_span = node.find_next_sibling('span')
+                if next_span:
+                    if label == 'published':
+                        published = next_span.get_text(strip=True)
+                    else:
+                        updated = next_span.get_text(strip=True)
+
+        if node.get('data-test') == 'contextual-subscription-hook':
+            child_hook = True
+        # Дети в обратном порядке, чтобы обход шел в порядке документа
+        for child in reversed(node.contents):
+            if isinstance(child, Tag):
+                stack.append((child, child_container, child_hook, child_related))
+
+    if not article_container:
+        return None
+    content = '\n'.join(paragraphs)
+    return content, related, author, published, updated
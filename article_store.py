@@ -0,0 +1,221 @@
+import difflib
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_STORE_PATH = 'articles.db'
+# Поля статьи, которые хранятся в текущей записи и в ревизиях
+ARTICLE_FIELDS = ('title', 'content', 'related', 'author', 'published', 'updated', 'publish_datetime')
+# Поля, от которых считается хэш содержимого: дата из листинга сюда не входит
+HASHED_FIELDS = ('title', 'content', 'related', 'author')
+
+NEW = 'new'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+
+
+def content_hash(article):
+    """SHA-256 полей HASHED_FIELDS статьи"""
+    data = json.dumps([article.get(field) for field in HASHED_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def make_delta(new, old):
+    """Обратная дельта по строкам: как из текста новой ревизии получить старый
+
+    Совпадающие куски хранятся как [начало, конец] строк нового текста,
+    остальное - строками старого текста.
+    """
+    new_lines = (new or '').split('\n')
+    old_lines = (old or '').split('\n')
+    ops = []
+    matcher = difflib.SequenceMatcher(None, new_lines, old_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append('\n'.join(old_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(new, ops):
+    """Старый текст из нового и дельты make_delta"""
+    new_lines = (new or '').split('\n')
+    lines = []
+    for op in ops:
+        if isinstance(op, str):
+            lines.extend(op.split('\n'))
+        else:
+            lines.extend(new_lines[op[0]:op[1]])
+    return '\n'.join(lines)
+
+
+class ArticleStore:
+    """Текущая версия каждой статьи (ключ - URL) и история ее правок (SQLite)
+
+    Запись хранит хэш содержимого и номер ревизии. Когда статья изменилась,
+    прошлая версия уходит в revisions сжатой обратной дельтой от новой, так
+    что многокилобайтные тела не копируются целиком на каждую правку.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS articles ('
+                ' link TEXT PRIMARY KEY,'
+                ' title TEXT,'
+                ' content TEXT,'
+                ' related TEXT,'
+                ' author TEXT,'
+                ' published TEXT,'
+                ' updated TEXT,'
+                ' publish_datetime TEXT,'
+                ' content_hash TEXT NOT NULL,'
+                ' revision INTEGER NOT NULL,'
+                ' fetched_at REAL NOT NULL,'
+                ' changed_at REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS revisions ('
+                ' link TEXT NOT NULL,'
+                ' revision INTEGER NOT NULL,'
+                ' content_hash TEXT NOT NULL,'
+                ' delta BLOB NOT NULL,'
+                ' changed_at REAL NOT NULL,'
+                ' PRIMARY KEY (link, revision))'
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load(self, link):
+        row = self._conn.execute(
+            f'SELECT {", ".join(ARTICLE_FIELDS)}, content_hash, revision, changed_at FROM articles WHERE link = ?',
+            (link,)
+        ).fetchone()
+        if row is None:
+            return None
+        record = dict(zip(ARTICLE_FIELDS + ('content_hash', 'revision', 'changed_at'), row))
+        record['link'] = link
+        record['related'] = json.loads(record['related']) if record['related'] else []
+        return record
+
+    def get(self, link):
+        """Текущая версия статьи или None"""
+        with self._lock:
+            return self._load(link)
+
+    def change(self, article):
+        """Чем статья отличается от сохраненной: NEW, UPDATED или UNCHANGED
+
+        Изменением считается другой хэш содержимого или другая дата Updated.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT content_hash, updated FROM articles WHERE link = ?', (article['link'],)
+            ).fetchone()
+        if row is None:
+            return NEW
+        stored_hash, stored_updated = row
+        if stored_hash != content_hash(article) or (article.get('updated') or None) != stored_updated:
+            return UPDATED
+        return UNCHANGED
+
+    def revised(self, candidates):
+        """Ссылки из candidates (link, publish_datetime), у которых дата в листинге новее сохраненной
+
+        Даты листинга в одном формате ('%Y-%m-%d %H:%M:%S'), поэтому сравниваются как строки.
+        """
+        listed = {link: publish_datetime for link, publish_datetime in candidates if publish_datetime}
+        links = list(listed)
+        revised = set()
+        with self._lock:
+            # Ограничение SQLite на число параметров в запросе
+            for i in range(0, len(links), 500):
+                chunk = links[i:i + 500]
+                rows = self._conn.execute(
+                    f'SELECT link, publish_datetime FROM articles WHERE link IN ({",".join("?" * len(chunk))})',
+                    chunk
+                )
+                revised.update(link for link, stored in rows if stored and listed[link] > stored)
+        return revised
+
+    def upsert_many(self, articles):
+        """Сохраняем пачку статей одной транзакцией, возвращаем NEW/UPDATED/UNCHANGED для каждой"""
+        now = time.time()
+        results = []
+        with self._lock, self._conn:
+            for article in articles:
+                results.append(self._upsert(article, now))
+        return results
+
+    def upsert(self, article):
+        return self.upsert_many([article])[0]
+
+    def _upsert(self, article, now):
+        link = article['link']
+        new_hash = content_hash(article)
+        values = [article.get(field) or None for field in ARTICLE_FIELDS]
+        values[ARTICLE_FIELDS.index('related')] = json.dumps(article.get('related') or [], ensure_ascii=False)
+        old = self._load(link)
+        if old is None:
+            self._conn.execute(
+                f'INSERT INTO articles (link, {", ".join(ARTICLE_FIELDS)}, content_hash, revision,'
+                f' fetched_at, changed_at) VALUES (?, {", ".join("?" * len(ARTICLE_FIELDS))}, ?, 1, ?, ?)',
+                [link] + values + [new_hash, now, now]
+            )
+            return NEW
+        if old['content_hash'] == new_hash and old['updated'] == (article.get('updated') or None):
+            # Дату листинга запоминаем, иначе revised() будет снова и снова звать на перезагрузку
+            self._conn.execute(
+                'UPDATE articles SET fetched_at = ?, publish_datetime = COALESCE(?, publish_datetime) WHERE link = ?',
+                (now, article.get('publish_datetime') or None, link)
+            )
+            return UNCHANGED
+        # Прошлая версия: тело дельтой от новой, короткие поля как есть
+        previous = {field: old[field] for field in ARTICLE_FIELDS if field != 'content'}
+        previous['content_delta'] = make_delta(article.get('content'), old['content'])
+        self._conn.execute(
+            'INSERT OR REPLACE INTO revisions (link, revision, content_hash, delta, changed_at) VALUES (?, ?, ?, ?, ?)',
+            (link, old['revision'], old['content_hash'],
+             zlib.compress(json.dumps(previous, ensure_ascii=False).encode('utf-8')), old['changed_at'])
+        )
+        self._conn.execute(
+            f'UPDATE articles SET {", ".join(f"{field} = ?" for field in ARTICLE_FIELDS)}, content_hash = ?,'
+            ' revision = ?, fetched_at = ?, changed_at = ? WHERE link = ?',
+            values + [new_hash, old['revision'] + 1, now, now, link]
+        )
+        return UPDATED
+
+    def history(self, link):
+        """Все версии статьи от текущей к первой; старые восстанавливаются из дельт"""
+        with self._lock:
+            current = self._load(link)
+            if current is None:
+                return []
+            rows = self._conn.execute(
+                'SELECT revision, content_hash, delta, changed_at FROM revisions WHERE link = ? ORDER BY revision DESC',
+                (link,)
+            ).fetchall()
+        versions = [current]
+        newer = current
+        for revision, stored_hash, delta, changed_at in rows:
+            previous = json.loads(zlib.decompress(delta))
+            previous['content'] = apply_delta(newer['content'], previous.pop('content_delta'))
+            previous.update(link=link, revision=revision, content_hash=stored_hash, changed_at=changed_at)
+            versions.append(previous)
+            newer = previous
+        return versions
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
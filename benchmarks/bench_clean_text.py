@@ -0,0 +1,129 @@
+"""Бенчмарк clean_text
+
+Сравнивает исходную цепочку re.sub + str.replace + encode/decode с
+табличной clean_text из text_clean на синтетических текстах и, если
+указан --csv, на полях уже собранных статей. Перед замером проверяется,
+что результаты совпадают символ в символ.
+
+    python benchmarks/bench_clean_text.py --csv articles.csv
+"""
+import argparse
+import csv
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_clean import clean_row, clean_text
+
+
+def legacy_clean_text(text):
+    """Исходная clean_text из latest.py / forex2.py"""
+    if not text:
+        return ''
+    text = re.sub(r'вЂ.{0,3}', '', text, flags=re.IGNORECASE)
+    return (text
+        .replace('’', "'")
+        .replace('‘', "'")
+        .replace('"', '"')
+        .replace('"', '"')
+        .replace('–', '-')
+        .replace('—', '-')
+        .replace('…', '...')
+        .replace('•', '-')
+        .replace('\xa0', ' ')
+        .encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
+    )
+
+
+def synthetic_texts(seed=0):
+    """Тексты разной длины и состава, похожие на тела статей"""
+    rnd = random.Random(seed)
+    words = ['market', 'dollar', 'rates', 'the', 'of', 'and', 'Fed', 'yield']
+    specials = ['’', '‘', '“', '”', '–', '—', '…', '•', '\xa0', 'вЂ™', 'ВЂ"x', '\u1c80ђ™', '\ud83d']
+
+    def body(n_words, n_specials):
+        text = ' '.join(rnd.choice(words) for _ in range(n_words))
+        for _ in range(n_specials):
+            pos = rnd.randrange(len(text))
+            text = text[:pos] + rnd.choice(specials) + text[pos:]
+        return text
+
+    return {
+        'большое тело ASCII': body(20000, 0),
+        'большое тело, редкие типографские символы': body(20000, 60),
+        'большое тело, частые типографские символы': body(20000, 5000),
+        'заголовок': body(12, 2),
+        'автор': 'Jane Analyst',
+    }
+
+
+def edge_texts():
+    """Короткие тексты на границах совпадения 'вЂ.{0,3}': регистры, перевод строки, края текста
+
+    Под re.IGNORECASE с 'в' совпадает и U+1C80 (CYRILLIC SMALL LETTER ROUNDED VE),
+    с 'Ђ' - только 'ђ'; clean_text обязана вести себя так же.
+    """
+    firsts = ['в', 'В', '\u1c80', 'ᲁ', 'б']
+    seconds = ['Ђ', 'ђ', 'Ћ']
+    tails = ['', '™', '\n™', 'ab\ncd', 'abcdef', 'вЂ™x']
+    return [f'{prefix}{first}{second}{tail}'
+            for prefix in ('', 'x ') for first in firsts for second in seconds for tail in tails]
+
+
+def load_csv_fields(path):
+    texts = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            texts.extend(value for value in row.values() if value)
+    return texts
+
+
+def bench(fn, texts, number):
+    return min(timeit.repeat(lambda: [fn(text) for text in texts], number=number, repeat=3)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк clean_text")
+    parser.add_argument('--csv', help="CSV с уже собранными статьями для проверки на реальных данных")
+    parser.add_argument('--number', type=int, default=20, help="число прогонов в одном замере")
+    args = parser.parse_args()
+
+    cases = {name: [text] for name, text in synthetic_texts().items()}
+    cases['крайние случаи битой кодировки'] = edge_texts()
+    if args.csv:
+        cases['поля из ' + os.path.basename(args.csv)] = load_csv_fields(args.csv)
+
+    print(f"{'набор':45} {'исходная':>12} {'табличная':>12} {'ускорение':>10}")
+    for name, texts in cases.items():
+        for text in texts:
+            assert clean_text(text) == legacy_clean_text(text), f"результаты расходятся: {name}"
+        old = bench(legacy_clean_text, texts, args.number)
+        new = bench(clean_text, texts, args.number)
+        print(f"{name:45} {old * 1e6:10.1f}мкс {new * 1e6:10.1f}мкс {old / new:9.1f}x")
+
+    # Пакетный режим: очистка целой строки статьи за один вызов
+    texts = synthetic_texts()
+    row = {
+        'title': texts['заголовок'],
+        'content': texts['большое тело, редкие типографские символы'],
+        'related': [{'ticker': 'EUR/USD', 'url': '/currencies/eur-usd'}],
+        'author': texts['автор'],
+    }
+    fields = list(row)
+    rows = [row] * 100
+    old = min(timeit.repeat(lambda: [
+        {**r, 'title': legacy_clean_text(r['title']), 'content': legacy_clean_text(r['content']),
+         'author': legacy_clean_text(r['author']),
+         'related': [{'ticker': legacy_clean_text(x['ticker']), 'url': legacy_clean_text(x['url'])}
+                     for x in r['related']]}
+        for r in rows], number=1, repeat=3))
+    new = min(timeit.repeat(lambda: [clean_row(r, fields) for r in rows], number=1, repeat=3))
+    print(f"{'100 строк статей (clean_row)':45} {old * 1e3:10.2f}мс  {new * 1e3:10.2f}мс  {old / new:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Сквозной бенчмарк сбора на локальном стенде investing.com
+
+Поднимает benchmarks/standin_server.py в отдельном процессе и прогоняет
+настоящие main() из latest.py и forex2.py, каждый в своем процессе с чистыми
+индексом, сессией и файлом вывода. Замеряются статьи/с, p50/p99 времени
+на статью (загрузка и разбор), процессорное время и пиковый RSS процесса
+сбора. Результат пишется в JSON; с --compare печатается разница с прошлым.
+
+    python benchmarks/bench_e2e.py --latency 0.1 --rate-429 0.02 --output bench.json
+    python benchmarks/bench_e2e.py --output bench_new.json --compare bench.json
+    python benchmarks/bench_e2e.py --chunked --stream --output stream.json --compare bench.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from standin_server import add_server_arguments, config_from_args, start_server
+
+SCRIPTS = ('latest', 'forex2')
+# Метрики, по которым --compare считает разницу; True - чем больше, тем лучше
+COMPARED = {
+    'articles_per_sec': True,
+    'latency_p50': False,
+    'latency_p99': False,
+    'cpu_seconds': False,
+    'peak_rss_mb': False,
+    'bytes_per_article': False,
+}
+
+
+def serve(args, base_url_queue, stop):
+    """Процесс стенда: работает до stop, затем отдает свою статистику"""
+    config = config_from_args(args)
+    server, base_url = start_server(config)
+    base_url_queue.put(base_url)
+    stop.wait()
+    server.shutdown()
+    base_url_queue.put({'requests': config.requests, 'injected': config.injected})
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))], 4)
+
+
+def crawl(script, base_url, options, result_queue):
+    """Процесс сбора: настоящий main() скрипта с замером времени на каждую статью"""
+    workdir = tempfile.mkdtemp(prefix=f'bench_{script}_')
+    os.chdir(workdir)
+    module = __import__(script)
+    import crawler
+    from metrics import metrics
+
+    latencies = []
+    fetch_article = crawler.get_article_content_cloudscraper
+
+    def timed_fetch(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fetch_article(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    crawler.get_article_content_cloudscraper = timed_fetch
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        written = module.main(output='articles.csv', base_url=base_url, browser_fallback=False, **options)
+    wall = time.perf_counter() - start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    articles = sum(written.values())
+    # Байты статей по сети и после распаковки: с --stream против прогона без него - экономия
+    # потоковой загрузки, в том числе на ответах без Content-Length
+    counters = metrics.snapshot()['counters']
+    wire_bytes = sum(counter['value'] for counter in counters if counter['name'] == 'article_wire_bytes')
+    decoded_bytes = sum(counter['value'] for counter in counters if counter['name'] == 'article_decoded_bytes')
+    wire_unknown = sum(counter['value'] for counter in counters if counter['name'] == 'article_wire_bytes_unknown')
+    result_queue.put({
+        'articles': articles,
+        'fetched': len(latencies),
+        'wall_seconds': round(wall, 3),
+        'articles_per_sec': round(articles / wall, 3) if wall else None,
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p99': percentile(latencies, 0.99),
+        'latency_mean': round(statistics.mean(latencies), 4) if latencies else None,
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime - usage_before.ru_utime - usage_before.ru_stime, 3),
+        # ru_maxrss в Linux - в килобайтах
+        'peak_rss_mb': round(usage.ru_maxrss / 1024, 1),
+        # Без сжатого chunked при обычной загрузке: там байты по сети не узнать
+        'bytes_per_article': round(wire_bytes / len(latencies)) if latencies and not wire_unknown else None,
+        'decoded_bytes_per_article': round(decoded_bytes / len(latencies)) if latencies else None,
+    })
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    print(f"\nСравнение с {previous.get('commit') or 'прошлым прогоном'}:")
+    for script, result in current['results'].items():
+        old = previous.get('results', {}).get(script)
+        if not old:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            better = change > 0 if higher_is_better else change < 0
+            mark = '' if abs(change) < 5 else (' лучше' if better else ' ХУЖЕ')
+            print(f"  {script:8} {metric:18} {before:>10} -> {after:<10} {change:+6.1f}%{mark}")
+
+
+def main():
+    from fetch_pool import DEFAULT_MAX_PER_HOST
+    from rate_control import DEFAULT_INITIAL_RATE
+
+    parser = argparse.ArgumentParser(description="Сквозной бенчмарк сбора на локальном стенде")
+    add_server_arguments(parser)
+    parser.add_argument('--scripts', nargs='+', choices=SCRIPTS, default=list(SCRIPTS),
+                        help="какие скрипты прогонять")
+    parser.add_argument('--max-per-host', type=int, default=DEFAULT_MAX_PER_HOST,
+                        help="максимум одновременных запросов к стенду")
+    parser.add_argument('--rate', type=float, default=DEFAULT_INITIAL_RATE,
+                        help="стартовый темп запросов в секунду")
+    parser.add_argument('--stream', action='store_true', help="качать статьи потоком с ранней остановкой")
+    parser.add_argument('--output', default='bench_e2e.json', help="куда записать результаты")
+    parser.add_argument('--compare', help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    base_url_queue = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args, base_url_queue, stop), daemon=True)
+    server.start()
+    base_url = base_url_queue.get(timeout=30)
+    print(f"Стенд: {base_url}")
+
+    options = {'max_per_host': args.max_per_host, 'rate': args.rate, 'stream': args.stream}
+    results = {}
+    try:
+        for script in args.scripts:
+            result_queue = multiprocessing.Queue()
+            process = multiprocessing.Process(target=crawl, args=(script, base_url, options, result_queue))
+            process.start()
+            results[script] = result_queue.get()
+            process.join()
+            result = results[script]
+            print(f"{script:8} статей: {result['articles']:4}  {result['articles_per_sec']:7.2f} статей/с  "
+                  f"p50 {result['latency_p50']} с  p99 {result['latency_p99']} с  "
+                  f"CPU {result['cpu_seconds']} с  RSS {result['peak_rss_mb']} МБ  "
+                  f"{result['bytes_per_article']} байт/статью по сети "
+                  f"({result['decoded_bytes_per_article']} после распаковки)")
+    finally:
+        stop.set()
+    server_stats = base_url_queue.get(timeout=30)
+    server.join()
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'server': {
+            'listing_pages': args.listing_pages,
+            'items_per_page': args.items_per_page,
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'error_rate': args.error_rate,
+            'rate_429': args.rate_429,
+            'seed': args.seed,
+            'gzip': args.gzip,
+            'chunked': args.chunked,
+            'recorded_pages': bool(args.pages),
+            'recorded_listings': bool(args.listings),
+        },
+        'crawl': options,
+        'server_stats': server_stats,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Бенчмарк времени импорта скриптов сбора
+
+Запускает свежий интерпретатор с -X importtime для каждого модуля несколько
+раз, печатает медиану суммарного времени импорта и самые долгие модули.
+Завершается с ошибкой, если время вышло за бюджет или при запуске загрузилось
+то, что должно подгружаться лениво (selenium, cloudscraper, multiprocessing):
+задания опроса запускают новый процесс каждые несколько минут.
+
+    python benchmarks/bench_import.py --budget 250
+    python benchmarks/bench_import.py --modules latest forex2 crawler --top 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ('latest', 'forex2')
+# Бюджет на импорт модуля, миллисекунд
+DEFAULT_BUDGET_MS = 250
+# Эти пакеты нужны только на редких путях и не должны грузиться при импорте
+LAZY_MODULES = ('selenium', 'undetected_chromedriver', 'cloudscraper', 'multiprocessing')
+
+
+def import_times(module):
+    """Один запуск: {модуль: (собственное, суммарное время в мкс)} и время процесса, с"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times, wall
+
+
+def measure(module, repeat):
+    runs = [import_times(module) for _ in range(repeat)]
+    totals = [times[module][1] / 1000 for times, _ in runs]
+    # Для разбивки по модулям берем запуск с медианным временем
+    median_run = sorted(runs, key=lambda run: run[0][module][1])[len(runs) // 2][0]
+    return {
+        'median_ms': statistics.median(totals),
+        'min_ms': min(totals),
+        'process_ms': statistics.median(wall for _, wall in runs) * 1000,
+        'times': median_run,
+        'lazy_loaded': [
+            lazy for lazy in LAZY_MODULES
+            if any(name == lazy or name.startswith(lazy + '.') for name in median_run)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время импорта скриптов сбора")
+    parser.add_argument('--modules', nargs='+', default=list(MODULES), help="какие модули импортировать")
+    parser.add_argument('--repeat', type=int, default=7, help="запусков интерпретатора на модуль")
+    parser.add_argument('--top', type=int, default=10, help="сколько самых долгих модулей показать")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help="бюджет на импорт модуля, миллисекунд")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        print(f"{module}: импорт {result['median_ms']:.1f} мс (медиана, мин. {result['min_ms']:.1f}), "
+              f"процесс целиком {result['process_ms']:.1f} мс, бюджет {args.budget:.0f} мс")
+        slowest = sorted((item for item in result['times'].items() if item[0] != module),
+                         key=lambda item: item[1][1], reverse=True)
+        for name, (self_us, cumulative_us) in slowest[:args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} мс  (свое {self_us / 1000:6.1f})  {name}")
+        if result['median_ms'] > args.budget:
+            print(f"  ПРЕВЫШЕН бюджет: {result['median_ms']:.1f} > {args.budget:.0f} мс")
+            failed = True
+        if result['lazy_loaded']:
+            print(f"  При импорте загружены ленивые модули: {', '.join(result['lazy_loaded'])}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
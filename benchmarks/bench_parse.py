@@ -0,0 +1,170 @@
+"""Микробенчмарк разбора страницы статьи
+
+Сравнивает исходный многопроходный разбор BeautifulSoup, однопроходный
+extract_from_soup и движок lxml на сохраненных страницах статей
+(например, телах из кэша http_cache) или на синтетической странице.
+Перед замером проверяется, что все варианты дают одинаковый результат,
+в том числе разбор начала страницы, на котором остановилась потоковая
+загрузка (ArticleStream).
+
+    python benchmarks/bench_parse.py --pages http_cache --repeat 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from article_parser import ArticleStream, extract_from_soup, parse_article
+
+
+def legacy_extract(soup):
+    """Исходный разбор из get_article_content_cloudscraper (несколько обходов дерева)"""
+    article_container = soup.find('div', class_=lambda x: x and 'articlePage' in x)
+    if not article_container:
+        return None
+    paragraphs = []
+    for p in article_container.find_all('p'):
+        if not p.find_parent(attrs={'data-test': 'contextual-subscription-hook'}):
+            text = p.get_text(strip=True)
+            if text:
+                paragraphs.append(text)
+    content = '\n'.join(paragraphs)
+
+    related = []
+    related_section = soup.find('div', {'data-test': 'related-instruments-section'})
+    if related_section:
+        for rel in related_section.find_all('div', class_='relative'):
+            a = rel.find('a', href=True)
+            ticker = rel.find('span')
+            if a and ticker:
+                related.append({
+                    'url': a['href'],
+                    'ticker': ticker.get_text(strip=True)
+                })
+
+    author = None
+    author_block = soup.find('span', string='Author')
+    if author_block:
+        author_link = author_block.find_next('a')
+        if author_link:
+            author = author_link.get_text(strip=True)
+
+    published = None
+    updated = None
+    for span in soup.find_all('span'):
+        if span.get_text(strip=True).lower() == 'published':
+            next_span = span.find_next_sibling('span')
+            if next_span:
+                published = next_span.get_text(strip=True)
+        if span.get_text(strip=True).lower() == 'updated':
+            next_span = span.find_next_sibling('span')
+            if next_span:
+                updated = next_span.get_text(strip=True)
+
+    return content, related, author, published, updated
+
+
+def synthetic_page(seed=0, paragraphs=40, menu_items=400):
+    """Страница, похожая по структуре на статью investing.com"""
+    rnd = random.Random(seed)
+    words = ['market', 'dollar', 'euro', 'yield', 'Fed', 'rates', 'inflation', 'stocks', 'oil', 'gold']
+
+    def sentence(n):
+        return ' '.join(rnd.choice(words) for _ in range(n))
+
+    menu = ''.join(
+        f'<li><a href="/m/{i}"><span class="icon"></span><span>{sentence(2)}</span></a></li>'
+        for i in range(menu_items)
+    )
+    body = ''.join(f'<p>{sentence(40)} <a href="/q/{i}">{sentence(2)}</a>.</p>' for i in range(paragraphs))
+    related = ''.join(
+        f'<div class="relative flex"><a href="/currencies/pair-{i}"></a><span>PAIR{i}</span><span>+0.{i}%</span></div>'
+        for i in range(6)
+    )
+    footer = ''.join(f'<div><span>{sentence(3)}</span><span>{sentence(1)}</span></div>' for _ in range(menu_items))
+    return (
+        f'<html><head><script>{"x" * 20000}</script></head><body><nav><ul>{menu}</ul></nav>'
+        f'<div data-test="related-instruments-section">{related}</div>'
+        f'<div><span>Author</span><a href="/members/1">Jane Analyst</a></div>'
+        f'<div><div><span>Published</span><span>10/18/2026, 08:00 AM</span></div>'
+        f'<div><span>Updated</span><span>10/18/2026, 09:15 AM</span></div></div>'
+        f'<div class="article_articlePage__x text-lg">{body}'
+        f'<div data-test="contextual-subscription-hook"><p>{sentence(20)}</p></div></div>'
+        f'<footer>{footer}</footer><script>{"y" * 50000}</script></body></html>'
+    )
+
+
+def streamed_prefix(page, chunk_size=4096):
+    """Начало страницы, на котором ArticleStream остановил бы загрузку"""
+    data = page.encode('utf-8')
+    stream = ArticleStream()
+    for i in range(0, len(data), chunk_size):
+        if stream.feed(data[i:i + chunk_size]):
+            break
+    return stream.html
+
+
+def load_pages(path):
+    pages = []
+    for folder, _, files in os.walk(path):
+        for name in sorted(files):
+            if name.endswith(('.html', '.htm', '.body')):
+                with open(os.path.join(folder, name), 'rb') as f:
+                    pages.append(f.read().decode('utf-8', errors='replace'))
+    return pages
+
+
+def measure(fn, pages, repeat):
+    """Среднее процессорное время на страницу, мс (лучший из повторов)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time()
+        for page in pages:
+            fn(page)
+        timings.append((time.process_time() - start) / len(pages) * 1000)
+    return min(timings), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора страниц статей")
+    parser.add_argument('--pages', help="каталог с сохраненными страницами (*.html, *.body)")
+    parser.add_argument('--repeat', type=int, default=5, help="число повторов замера")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages) if args.pages else [synthetic_page(seed) for seed in range(3)]
+    if not pages:
+        sys.exit("Страницы не найдены")
+    soups = [BeautifulSoup(page, 'html.parser') for page in pages]
+
+    # Все варианты обязаны давать одинаковый результат
+    for page, soup in zip(pages, soups):
+        expected = legacy_extract(soup)
+        assert extract_from_soup(soup) == expected, "однопроходный разбор расходится с исходным"
+        assert parse_article(page, 'lxml') == expected, "движок lxml расходится с исходным"
+        assert parse_article(streamed_prefix(page), 'lxml') == expected, "потоковая загрузка теряет поля"
+
+    print(f"Страниц: {len(pages)}, средний размер: {sum(map(len, pages)) // len(pages)} символов")
+    print("Только извлечение по готовому дереву BeautifulSoup:")
+    soup_by_page = dict(zip(map(id, pages), soups))
+    for label, fn in (('исходный (несколько обходов)', legacy_extract), ('один обход', extract_from_soup)):
+        best, median = measure(lambda page: fn(soup_by_page[id(page)]), pages, args.repeat)
+        print(f"  {label:32} {best:8.2f} мс/стр (медиана {median:.2f})")
+    print("Полный разбор страницы (построение дерева + извлечение):")
+    variants = (
+        ('html.parser + исходный', lambda page: legacy_extract(BeautifulSoup(page, 'html.parser'))),
+        ('html.parser + один обход', lambda page: parse_article(page, 'bs4')),
+        ('lxml + XPath', lambda page: parse_article(page, 'lxml')),
+    )
+    for label, fn in variants:
+        best, median = measure(fn, pages, args.repeat)
+        print(f"  {label:32} {best:8.2f} мс/стр (медиана {median:.2f})")
+
+
+if __name__ == "__main__":
+    main()
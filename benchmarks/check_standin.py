@@ -0,0 +1,205 @@
+"""Проверки сценариев сбора на локальном стенде investing.com
+
+Каждый сценарий поднимает benchmarks/standin_server.py в этом же процессе,
+прогоняет настоящий Crawler в чистом временном каталоге и сверяет, какие
+статьи оказались в выводе. Завершается с ошибкой, если сценарий не прошел.
+
+    python benchmarks/check_standin.py
+    python benchmarks/check_standin.py since_last_failures
+"""
+import argparse
+import contextlib
+import csv
+import os
+import sys
+import tempfile
+import traceback
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parse import load_pages, synthetic_page
+from standin_server import FIXTURE_LISTINGS, StandinConfig, start_server
+
+import crawler
+
+SCENARIOS = {}
+
+
+def scenario(fn):
+    SCENARIOS[fn.__name__] = fn
+    return fn
+
+
+@contextlib.contextmanager
+def standin(**options):
+    """Стенд в фоновом потоке: (config, base_url); config можно менять между запусками"""
+    config = StandinConfig([synthetic_page(seed) for seed in range(3)], **options)
+    server, base_url = start_server(config)
+    try:
+        yield config, base_url
+    finally:
+        server.shutdown()
+
+
+def crawl(base_url, feeds, **options):
+    """Один запуск Crawler с выводом в консоль, подавленным до итогов"""
+    options.setdefault('browser_fallback', False)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return crawler.run_feeds(feeds, base_url=base_url, **options)
+
+
+def read_links(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [row['link'] for row in csv.DictReader(f)]
+
+
+@scenario
+def since_last_failures(workdir):
+    """--since last: статьи, которые не скачались, собираются следующим запуском"""
+    feed = crawler.FEEDS['latest'].replace(output=os.path.join(workdir, 'articles.csv'))
+    with standin(listing_pages=1, items_per_page=10, error_rate=0.3, seed=3) as (config, base_url):
+        crawl(base_url, [feed], since='last', rate=100)
+        first = read_links(feed.output)
+        assert 0 < len(first) < 10, f"стенд должен был уронить часть статей, собрано {len(first)}"
+        config.error_rate = 0.0
+        crawl(base_url, [feed], since='last', rate=100)
+    links = read_links(feed.output)
+    assert len(links) == len(set(links)) == 10, f"за два запуска собрано {len(set(links))} из 10"
+    return f"первый запуск {len(first)} из 10, после второго - {len(links)}"
+
+
+@scenario
+def since_last_write_failures(workdir):
+    """--since last: статьи, которые скачались, но не записались, собираются следующим запуском"""
+    feed = crawler.FEEDS['latest'].replace(output=os.path.join(workdir, 'articles.csv'))
+    clean_row = crawler.clean_row
+
+    def failing_clean_row(row, fields):
+        # Каждая третья статья падает при очистке - как при любой ошибке записи
+        if int(row['link'].rsplit('-', 1)[1]) % 3 == 1:
+            raise ValueError("сбой записи")
+        return clean_row(row, fields)
+
+    with standin(listing_pages=1, items_per_page=10) as (_, base_url):
+        crawler.clean_row = failing_clean_row
+        try:
+            crawl(base_url, [feed], since='last', rate=100)
+        finally:
+            crawler.clean_row = clean_row
+        first = read_links(feed.output)
+        assert len(first) == 7, f"должно было записаться 7 статей из 10, записано {len(first)}"
+        crawl(base_url, [feed], since='last', rate=100)
+    links = read_links(feed.output)
+    assert len(links) == len(set(links)) == 10, f"за два запуска собрано {len(set(links))} из 10"
+    return f"первый запуск {len(first)} из 10, после второго - {len(links)}"
+
+
+@scenario
+def recorded_listing(workdir):
+    """Записанный листинг (fixtures/listings): собраны все карточки обеих страниц, реклама пропущена"""
+    import re
+
+    pages = load_pages(FIXTURE_LISTINGS)
+    expected = [
+        re.sub(r'^https://www\.investing\.com', '', href)
+        for page in pages for href in re.findall(r'data-test="article-title-link"[^>]* href="([^"]+)"', page)
+    ]
+    feed = crawler.FEEDS['latest'].replace(output=os.path.join(workdir, 'articles.csv'), paginate=True)
+    with standin(listings=pages) as (_, base_url):
+        crawl(base_url, [feed])
+    links = [link[len(base_url):] for link in read_links(feed.output)]
+    assert len(expected) == 10 and sorted(links) == sorted(expected), \
+        f"собрано {len(links)} из {len(expected)}: {sorted(set(expected) - set(links))}"
+    return f"{len(pages)} страницы листинга, собрано {len(links)} статей"
+
+
+@scenario
+def replay_after_online(workdir):
+    """--replay после обычного запуска с --cache-dir: все статьи разбираются заново из кэша"""
+    import sqlite3
+
+    feed = crawler.FEEDS['latest'].replace(output=os.path.join(workdir, 'articles.csv'))
+    cache_dir = os.path.join(workdir, 'http_cache')
+    index_path = os.path.join(workdir, 'seen.db')
+    with standin(listing_pages=1, items_per_page=20) as (_, base_url):
+        crawl(base_url, [feed], cache_dir=cache_dir, seen_index_path=index_path)
+        online = read_links(feed.output)
+        with contextlib.closing(sqlite3.connect(index_path)) as conn:
+            indexed = conn.execute('SELECT url, seen_at FROM seen ORDER BY url').fetchall()
+        os.remove(feed.output)
+        crawl(base_url, [feed], cache_dir=cache_dir, seen_index_path=index_path, replay=True)
+    replayed = read_links(feed.output)
+    assert online and replayed == online, f"из кэша разобрано {len(replayed)} из {len(online)}"
+    with contextlib.closing(sqlite3.connect(index_path)) as conn:
+        assert conn.execute('SELECT url, seen_at FROM seen ORDER BY url').fetchall() == indexed, \
+            "replay изменил индекс собранных статей"
+    return f"онлайн {len(online)} статей, из кэша {len(replayed)}, индекс не тронут"
+
+
+@scenario
+def replay_after_stream(workdir):
+    """--replay после запуска с --stream и --cache-dir: из кэша разбираются прочитанные начала страниц"""
+    feed = crawler.FEEDS['latest'].replace(output=os.path.join(workdir, 'articles.csv'))
+    cache_dir = os.path.join(workdir, 'http_cache')
+    with standin(listing_pages=1, items_per_page=10, compress=True, chunked=True) as (_, base_url):
+        crawl(base_url, [feed], cache_dir=cache_dir, stream=True)
+        online = read_links(feed.output)
+        with open(feed.output, encoding='utf-8') as f:
+            online_text = f.read()
+        os.remove(feed.output)
+        crawl(base_url, [feed], cache_dir=cache_dir, seen_index_path=os.path.join(workdir, 'replay.db'),
+              replay=True)
+    replayed = read_links(feed.output)
+    assert online and replayed == online, f"из кэша разобрано {len(replayed)} из {len(online)}"
+    with open(feed.output, encoding='utf-8') as f:
+        assert f.read() == online_text, "разбор из кэша отличается от онлайн-разбора"
+    return f"онлайн потоком {len(online)} статей, из кэша {len(replayed)}, строки совпадают"
+
+
+@scenario
+def work_queue_parquet(workdir):
+    """--work-queue с выводом в Parquet: сбор завершается, каждая статья записана один раз"""
+    import pyarrow.parquet
+
+    from work_queue import open_work_queue
+
+    feed = crawler.FEEDS['latest'].replace(output=os.path.join(workdir, 'articles.parquet'), page_slice=None)
+    with standin(listing_pages=1, items_per_page=5) as (_, base_url):
+        crawl(base_url, [feed], work_queue=os.path.join(workdir, 'queue.db'))
+    with open_work_queue(os.path.join(workdir, 'queue.db')) as tasks:
+        assert not tasks.pending(), f"в очереди остались задачи: {tasks.stats()}"
+    links = pyarrow.parquet.read_table(feed.output).column('link').to_pylist()
+    assert len(links) == len(set(links)) == 5, f"записано {len(links)}, разных {len(set(links))} из 5"
+    return f"записано {len(links)} статей, очередь пуста"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверки сценариев сбора на локальном стенде")
+    parser.add_argument('scenarios', nargs='*', help=f"какие сценарии проверять: {', '.join(SCENARIOS)} "
+                                                     f"(по умолчанию все)")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    failed = False
+    for name in args.scenarios or SCENARIOS:
+        with tempfile.TemporaryDirectory(prefix=f'check_{name}_') as workdir:
+            cwd = os.getcwd()
+            # Индекс, сессия и прочие файлы по умолчанию - во временном каталоге
+            os.chdir(workdir)
+            try:
+                print(f"{name}: ок, {SCENARIOS[name](workdir)}")
+            except Exception:
+                failed = True
+                print(f"{name}: ОШИБКА")
+                traceback.print_exc()
+            finally:
+                os.chdir(cwd)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
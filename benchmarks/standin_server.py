@@ -0,0 +1,235 @@
+"""Локальный стенд вместо investing.com для воспроизводимых замеров
+
+Отдает листинги лент /news/<лента>[/<номер>] с рабочей кнопкой 'Next' и
+страницы статей. Статьи берутся из сохраненных страниц (например, тел из
+кэша http_cache) или генерируются. Листинги по умолчанию генерируются и
+повторяют только те элементы разметки, которые читает crawler.py; с
+--listings страницы листинга отдаются из записанных файлов по порядку имен
+(первая - страница 1 любой ленты), ссылки на investing.com в них
+переписываются на стенд. В fixtures/listings лежит такая запись из двух
+страниц ленты latest-news. Она набрана вручную по разметке investing.com
+(карточки, реклама между ними, абсолютные и относительные ссылки,
+пагинация), а не снята с сайта: настоящие записи, например тела листингов
+из http_cache, кладутся в каталог так же. Задержка, доля ошибок 5xx и ответов 429
+настраиваются, случайность воспроизводима через --seed. С --gzip ответы
+сжимаются, если клиент их принимает, с --chunked страницы отдаются кусками
+без Content-Length, как их обычно отдает Cloudflare.
+
+    python benchmarks/standin_server.py --port 8000 --latency 0.1 --rate-429 0.02
+    python latest.py --base-url http://127.0.0.1:8000 --no-browser
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parse import load_pages, synthetic_page
+
+# Страниц в пагинации ленты и статей на странице листинга
+DEFAULT_LISTING_PAGES = 5
+DEFAULT_ITEMS_PER_PAGE = 40
+# Записанные листинги из репозитория
+FIXTURE_LISTINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'listings')
+# Адреса investing.com в записанных страницах: на стенде они становятся путями от корня
+SITE_URL = re.compile(rb'https?://(?:www\.)?investing\.com(?=/)')
+
+
+class StandinConfig:
+    """Содержимое и поведение стенда"""
+
+    def __init__(self, articles, listing_pages=DEFAULT_LISTING_PAGES, items_per_page=DEFAULT_ITEMS_PER_PAGE,
+                 latency=0.0, jitter=0.0, error_rate=0.0, rate_429=0.0, retry_after=1, seed=0, compress=False,
+                 chunked=False, listings=None):
+        self.articles = [page.encode('utf-8') for page in articles]
+        self.listings = [SITE_URL.sub(b'', page.encode('utf-8')) for page in listings or ()]
+        self.listing_pages = len(self.listings) if self.listings else listing_pages
+        self.items_per_page = items_per_page
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.compress = compress
+        self.chunked = chunked
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.injected = {'429': 0, '500': 0}
+        # Даты публикации отсчитываются от запуска стенда, как у свежей ленты
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def listing(self, feed, page):
+        """Страница листинга; None, если такой страницы нет"""
+        if not 1 <= page <= self.listing_pages:
+            return None
+        if self.listings:
+            return self.listings[page - 1]
+        items = []
+        for i in range(self.items_per_page):
+            number = (page - 1) * self.items_per_page + i
+            published = (self.now - timedelta(minutes=number)).strftime('%Y-%m-%d %H:%M:%S')
+            items.append(
+                f'<article data-test="article-item">'
+                f'<a data-test="article-title-link" href="/news/{feed}/{feed}-article-{number}">'
+                f'{feed} headline {number}</a>'
+                f'<time data-test="article-publish-date" datetime="{published}">{number} minutes ago</time>'
+                f'</article>'
+            )
+        next_link = f'<a href="/news/{feed}/{page + 1}">Next</a>' if page < self.listing_pages else ''
+        return f'<html><body><main>{"".join(items)}</main>{next_link}</body></html>'.encode('utf-8')
+
+    def article(self, path):
+        digest = hashlib.sha256(path.encode('utf-8')).digest()
+        return self.articles[int.from_bytes(digest[:4], 'big') % len(self.articles)]
+
+    def roll(self):
+        """Какой сбой внедрить в этот ответ: None, '429' или '500'"""
+        with self.lock:
+            self.requests += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            value = self.random.random()
+            fault = None
+            if value < self.rate_429:
+                fault = '429'
+            elif value < self.rate_429 + self.error_rate:
+                fault = '500'
+            if fault:
+                self.injected[fault] += 1
+        return delay, fault
+
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b'', headers=()):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(body)
+
+        def _send_chunked(self, body, headers, chunk_size=16 * 1024):
+            self.send_response(200)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i in range(0, len(body), chunk_size):
+                chunk = body[i:i + chunk_size]
+                self.wfile.write(f'{len(chunk):x}\r\n'.encode('ascii') + chunk + b'\r\n')
+            self.wfile.write(b'0\r\n\r\n')
+
+        def do_HEAD(self):
+            # Проверка сессии в cf_session - всегда успешна
+            self._send(200)
+
+        def do_GET(self):
+            delay, fault = config.roll()
+            if delay:
+                time.sleep(delay)
+            if fault == '429':
+                return self._send(429, b'Too Many Requests', [('Retry-After', str(config.retry_after))])
+            if fault == '500':
+                return self._send(500, b'Internal Server Error')
+            parts = self.path.split('?')[0].strip('/').split('/')
+            if len(parts) < 2 or parts[0] != 'news':
+                return self._send(404, b'Not Found')
+            feed = parts[1]
+            if len(parts) == 2:
+                body = config.listing(feed, 1)
+            elif parts[2].isdigit():
+                body = config.listing(feed, int(parts[2]))
+            else:
+                body = config.article(self.path)
+            if body is None:
+                return self._send(404, b'Not Found')
+            headers = [('Content-Type', 'text/html; charset=utf-8')]
+            if config.compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip.compress(body, compresslevel=6)
+                headers.append(('Content-Encoding', 'gzip'))
+            if config.chunked:
+                return self._send_chunked(body, headers)
+            self._send(200, body, headers)
+
+    return Handler
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Клиент с потоковой загрузкой обрывает соединение посреди ответа - это не ошибка стенда
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+def start_server(config, host='127.0.0.1', port=0):
+    """Запуск стенда в фоновом потоке, возвращает (server, base_url)"""
+    server = StandinServer((host, port), make_handler(config))
+    threading.Thread(target=server.serve_forever, name='standin', daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+
+def add_server_arguments(parser):
+    parser.add_argument('--pages', help="каталог с сохраненными страницами статей (*.html, *.body)")
+    parser.add_argument('--listings', help="каталог с записанными страницами листинга по порядку имен "
+                                           f"(*.html, *.body), например {FIXTURE_LISTINGS}")
+    parser.add_argument('--listing-pages', type=int, default=DEFAULT_LISTING_PAGES,
+                        help="страниц в пагинации каждой ленты")
+    parser.add_argument('--items-per-page', type=int, default=DEFAULT_ITEMS_PER_PAGE,
+                        help="статей на странице листинга")
+    parser.add_argument('--latency', type=float, default=0.05, help="задержка ответа, секунд")
+    parser.add_argument('--jitter', type=float, default=0.05, help="случайная добавка к задержке, секунд")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="доля ответов 500")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After в ответах 429, секунд")
+    parser.add_argument('--seed', type=int, default=0, help="зерно случайных задержек и сбоев")
+    parser.add_argument('--gzip', action='store_true', help="сжимать ответы, если клиент принимает gzip")
+    parser.add_argument('--chunked', action='store_true', help="отдавать страницы кусками без Content-Length")
+
+
+def config_from_args(args):
+    articles = load_pages(args.pages) if args.pages else [synthetic_page(seed) for seed in range(3)]
+    if not articles:
+        sys.exit("Страницы не найдены")
+    listings = load_pages(args.listings) if args.listings else None
+    if args.listings and not listings:
+        sys.exit("Страницы листинга не найдены")
+    return StandinConfig(articles, listing_pages=args.listing_pages, items_per_page=args.items_per_page,
+                         latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                         rate_429=args.rate_429, retry_after=args.retry_after, seed=args.seed,
+                         compress=args.gzip, chunked=args.chunked, listings=listings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный стенд investing.com")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    server, base_url = start_server(config_from_args(args), args.host, args.port)
+    print(f"Стенд запущен: {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
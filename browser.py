@@ -0,0 +1,214 @@
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+
+# Selenium импортируется внутри функций: браузер нужен только на запасном пути,
+# а импорт selenium - самая долгая часть запуска скриптов
+# Страница готова, как только в DOM появился список статей или тело статьи
+READY_SELECTOR = "article[data-test='article-item'], div[class*='articlePage']"
+# Как часто опрашивать DOM
+POLL_INTERVAL = 0.25
+# Одна попытка ждет не дольше этого, затем страница перезагружается
+ATTEMPT_TIMEOUT = 15
+# Пауза перед повтором: случайная в [0, min(BACKOFF_MAX, BACKOFF_BASE * 2^попытка)]
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 8.0
+# Долгоживущий Chrome копит память, поэтому после стольких страниц браузер перезапускается
+DEFAULT_PAGES_PER_BROWSER = 50
+# Сколько ждать свободный браузер из пула и загрузку страницы, секунд
+ACQUIRE_TIMEOUT = 120
+PAGE_LOAD_TIMEOUT = 60
+
+
+def setup_driver(headless=True):
+    """Headless Chrome через undetected-chromedriver"""
+    import undetected_chromedriver as uc
+    options = uc.ChromeOptions()
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-gpu')
+    driver = uc.Chrome(options=options, headless=headless)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    return driver
+
+
+def human_like_scroll(driver):
+    """Имитация человеческой прокрутки"""
+    total_height = driver.execute_script("return document.body.scrollHeight")
+    current_position = 0
+    while current_position < total_height:
+        scroll_amount = random.randint(100, 300)
+        current_position += scroll_amount
+        driver.execute_script(f"window.scrollTo(0, {current_position});")
+        time.sleep(random.uniform(0.1, 0.3))
+
+
+class WaitResult:
+    """Итог ожидания: пройдена ли проверка, сколько секунд и попыток ушло"""
+
+    def __init__(self, passed, waited, attempts):
+        self.passed = passed
+        self.waited = waited
+        self.attempts = attempts
+
+    def __bool__(self):
+        return self.passed
+
+
+def _page_ready(driver):
+    from selenium.webdriver.common.by import By
+    return bool(driver.find_elements(By.CSS_SELECTOR, READY_SELECTOR))
+
+
+def wait_for_cloudflare(driver, timeout=30):
+    """Ожидание прохождения проверки Cloudflare, не дольше timeout секунд в сумме
+
+    Возвращаемся, как только на странице появился настоящий контент.
+    Если попытка не удалась, ждем с экспоненциальной паузой и джиттером
+    и перезагружаем страницу.
+    """
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    start = time.monotonic()
+    deadline = start + timeout
+    attempt = 0
+    while True:
+        attempt += 1
+        remaining = deadline - time.monotonic()
+        try:
+            WebDriverWait(driver, min(ATTEMPT_TIMEOUT, max(remaining, 0)),
+                          poll_frequency=POLL_INTERVAL).until(_page_ready)
+            waited = time.monotonic() - start
+            print(f"Cloudflare проверка пройдена за {waited:.1f} с (попыток: {attempt})")
+            return WaitResult(True, waited, attempt)
+        except (TimeoutException, WebDriverException):
+            pause = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            if time.monotonic() + pause >= deadline:
+                waited = time.monotonic() - start
+                print(f"Не удалось пройти проверку Cloudflare за {waited:.1f} с (попыток: {attempt})")
+                return WaitResult(False, waited, attempt)
+            print(f"Попытка {attempt} не удалась, повтор через {pause:.1f} с...")
+            time.sleep(pause)
+            try:
+                driver.refresh()
+            except WebDriverException as e:
+                print(f"Не удалось обновить страницу: {str(e)}")
+
+
+def get_article_publish_datetime(article):
+    from selenium.webdriver.common.by import By
+    try:
+        time_elem = article.find_element(By.CSS_SELECTOR, 'time[data-test="article-publish-date"]')
+        dt_str = time_elem.get_attribute('datetime')
+        return datetime.strptime(dt_str, '%Y-%m-%d %H:%M:%S')
+    except Exception:
+        return datetime.min  # если не нашли дату, ставим минимальную
+
+
+class _Browser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class BrowserPool:
+    """Пул переиспользуемых headless Chrome для запасного пути
+
+    Браузер запускается один раз и обслуживает много страниц: запасная загрузка
+    стоит одной загрузки страницы, а не запуска Chrome. После pages_per_browser
+    страниц или при падении браузер заменяется новым. Cookies после пройденной
+    проверки Cloudflare отдаются в on_cookies(cookies, user_agent), чтобы
+    HTTP-сессия дальше работала без браузера.
+    """
+
+    def __init__(self, size=1, pages_per_browser=DEFAULT_PAGES_PER_BROWSER, headless=True, on_cookies=None):
+        self.size = size
+        self.pages_per_browser = pages_per_browser
+        self.headless = headless
+        self.on_cookies = on_cookies
+        # Сначала отдаем последний вернувшийся браузер - он прогрет лучше
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def prewarm(self, url=None):
+        """Запускаем все браузеры заранее в фоне; с url - сразу проходим на нем проверку"""
+        for _ in range(self.size):
+            threading.Thread(target=self._prewarm_one, args=(url,), name='browser-warmup', daemon=True).start()
+
+    def _prewarm_one(self, url):
+        try:
+            if url:
+                self.fetch(url)
+            else:
+                self._release(self._acquire(), healthy=True)
+        except Exception as e:
+            print(f"Не удалось прогреть браузер: {str(e)}")
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=ACQUIRE_TIMEOUT):
+            raise Exception("Нет свободного браузера в пуле")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            print("Запускаем headless Chrome...")
+            return _Browser(setup_driver(headless=self.headless))
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, browser, healthy):
+        if healthy and not self._closed and browser.pages < self.pages_per_browser:
+            self._idle.put(browser)
+        else:
+            self._quit(browser)
+        self._slots.release()
+
+    def _quit(self, browser):
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def fetch(self, url, timeout=30):
+        """HTML страницы, загруженной браузером из пула, после проверки Cloudflare
+
+        Если браузер упал, он заменяется новым и страница грузится еще раз.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        for attempt in range(2):
+            browser = self._acquire()
+            healthy = False
+            try:
+                browser.driver.get(url)
+                browser.pages += 1
+                if not wait_for_cloudflare(browser.driver, timeout=timeout):
+                    # Упавший браузер бросит здесь WebDriverException и будет заменен
+                    browser.driver.current_url
+                    healthy = True
+                    raise Exception("Не удалось пройти проверку Cloudflare")
+                html = browser.driver.page_source
+                if self.on_cookies:
+                    self.on_cookies(browser.driver.get_cookies(),
+                                    browser.driver.execute_script("return navigator.userAgent"))
+                healthy = True
+                return html
+            except WebDriverException as e:
+                print(f"Браузер не отвечает, заменяем его: {str(e)}")
+            finally:
+                self._release(browser, healthy)
+        raise Exception(f"Не удалось загрузить страницу в браузере: {url}")
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                return
@@ -0,0 +1,209 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка между процессами недоступна
+    fcntl = None
+
+DEFAULT_SESSION_FILE = 'cf_session.json'
+# Cookies Cloudflare, по сроку жизни которых планируется обновление сессии
+CF_CLEARANCE_COOKIE = 'cf_clearance'
+# Если у cf_clearance нет срока (или его нет вовсе), считаем сессию живой столько секунд
+DEFAULT_SESSION_TTL = 30 * 60
+# За сколько секунд до истечения обновлять сессию в фоне
+DEFAULT_REFRESH_MARGIN = 5 * 60
+
+
+def create_scraper():
+    """Сессия cloudscraper с настройками браузера, как в основных скриптах"""
+    # Импорт при первой сессии: --help и разбор аргументов обходятся без cloudscraper,
+    # а интерпретатор JS-проверок cloudscraper и так подгружает только на проверке
+    import cloudscraper
+    return cloudscraper.create_scraper(
+        browser={
+            'browser': 'chrome',
+            'platform': 'darwin',
+            'mobile': False,
+            'desktop': True
+        },
+        delay=15,
+        interpreter='native',
+    )
+
+
+class SessionManager:
+    """Сессия cloudscraper, переживающая перезапуски
+
+    Cookies и заголовки (важен User-Agent: cf_clearance к нему привязан)
+    хранятся в JSON-файле и общие для всех процессов: обновление идет под
+    файловой блокировкой, остальные процессы подхватывают свежий файл.
+    Перед использованием сохраненная сессия проверяется дешевым HEAD-запросом,
+    а незадолго до истечения cf_clearance фоновый поток обновляет ее заранее.
+    """
+
+    def __init__(self, warmup_url, path=DEFAULT_SESSION_FILE, check_url=None,
+                 refresh_margin=DEFAULT_REFRESH_MARGIN, default_ttl=DEFAULT_SESSION_TTL):
+        self.warmup_url = warmup_url
+        self.check_url = check_url or warmup_url
+        self.path = path
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.scraper = None
+        self.expires_at = None
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def start(self, warm=True):
+        """Сессия, готовая к работе; warm=False - без сети (например, для replay)"""
+        self.scraper = create_scraper()
+        if warm:
+            try:
+                self._ensure_valid()
+            except Exception as e:
+                # Работаем с непрогретой сессией, повторная попытка - из фонового потока
+                print(f"Ошибка в CloudScraper: {str(e)}")
+                self.expires_at = time.time() + self.refresh_margin + 60
+            self._refresher = threading.Thread(target=self._refresh_loop, name='cf-session', daemon=True)
+            self._refresher.start()
+        return self.scraper
+
+    def stop(self):
+        self._stop.set()
+
+    @contextmanager
+    def _locked(self):
+        """Эксклюзивная блокировка файла сессии между процессами"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save(self):
+        state = {
+            'saved_at': time.time(),
+            'expires_at': self.expires_at,
+            'headers': dict(self.scraper.headers),
+            'cookies': [
+                {
+                    'name': cookie.name,
+                    'value': cookie.value,
+                    'domain': cookie.domain,
+                    'path': cookie.path,
+                    'expires': cookie.expires,
+                    'secure': cookie.secure,
+                }
+                for cookie in self.scraper.cookies
+            ],
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def _apply(self, state):
+        """Переносим сохраненные cookies и заголовки в текущую сессию"""
+        self.scraper.headers.update(state['headers'])
+        for cookie in state['cookies']:
+            self.scraper.cookies.set(
+                cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'],
+                expires=cookie['expires'], secure=cookie['secure']
+            )
+        self.expires_at = state['expires_at']
+
+    def _session_expiry(self):
+        """Время истечения сессии по cookie cf_clearance"""
+        for cookie in self.scraper.cookies:
+            if cookie.name == CF_CLEARANCE_COOKIE and cookie.expires:
+                return cookie.expires
+        return time.time() + self.default_ttl
+
+    def adopt(self, cookies, user_agent):
+        """Берем cookies, полученные браузером после проверки, и делимся ими с другими процессами
+
+        cookies - список словарей в формате Selenium get_cookies().
+        """
+        with self._locked():
+            # cf_clearance привязан к User-Agent браузера, который его получил
+            self.scraper.headers['User-Agent'] = user_agent
+            for cookie in cookies:
+                self.scraper.cookies.set(
+                    cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'),
+                    expires=cookie.get('expiry'), secure=cookie.get('secure', False)
+                )
+            self.expires_at = self._session_expiry()
+            self._save()
+        print("Cookies из браузера переданы HTTP-сессии")
+
+    def _fresh(self, state):
+        return state is not None and state.get('expires_at', 0) - self.refresh_margin > time.time()
+
+    def _is_valid(self):
+        """Дешевая проверка, что сайт пускает нас с текущими cookies"""
+        try:
+            resp = self.scraper.head(self.check_url, timeout=30, allow_redirects=True)
+        except Exception as e:
+            print(f"Проверка сессии не удалась: {str(e)}")
+            return False
+        return resp.status_code == 200 and resp.headers.get('cf-mitigated') != 'challenge'
+
+    def _warm_up(self):
+        """Проходим проверку Cloudflare заново и сохраняем результат"""
+        print("Получаем cookies через CloudScraper...")
+        resp = self.scraper.get(self.warmup_url, timeout=60)
+        if resp.status_code != 200:
+            raise Exception(f"Ошибка CloudScraper: HTTP {resp.status_code}")
+        self.expires_at = self._session_expiry()
+        self._save()
+        print("Успешно получили cookies!")
+
+    def _ensure_valid(self):
+        state = self._load()
+        if self._fresh(state):
+            self._apply(state)
+            if self._is_valid():
+                print("Используем сохраненную сессию Cloudflare")
+                return
+        with self._locked():
+            # Пока ждали блокировку, сессию мог обновить другой процесс
+            state = self._load()
+            if self._fresh(state):
+                self._apply(state)
+                if self._is_valid():
+                    print("Используем сессию Cloudflare, обновленную другим процессом")
+                    return
+            self._warm_up()
+
+    def _refresh_loop(self):
+        while True:
+            delay = max(self.expires_at - self.refresh_margin - time.time(), 0)
+            if self._stop.wait(delay):
+                return
+            try:
+                with self._locked():
+                    state = self._load()
+                    if self._fresh(state):
+                        # Другой процесс уже обновил сессию - берем его cookies
+                        self._apply(state)
+                    else:
+                        self._warm_up()
+            except Exception as e:
+                print(f"Не удалось обновить сессию Cloudflare: {str(e)}")
+                if self._stop.wait(60):
+                    return
@@ -0,0 +1,1219 @@
+import argparse
+import itertools
+import queue
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup
+
+from article_parser import DEFAULT_ENGINE, ENGINES, ArticleStream, ParsePool, parse_article
+from article_store import UNCHANGED, UPDATED, ArticleStore
+from browser import BrowserPool
+from cf_session import DEFAULT_SESSION_FILE, SessionManager
+from fetch_pool import DEFAULT_MAX_PER_HOST, HostLimiter, map_ordered, size_connection_pool
+from http_cache import DEFAULT_CACHE_DIR, CachedSession
+from metrics import INGEST_BUCKETS, metrics, profiled
+from rate_control import DEFAULT_INITIAL_RATE, AdaptiveRateController, RateLimitedSession, is_refusal
+from seen_index import DEFAULT_INDEX_PATH, SeenIndex
+from sinks import open_sink
+from text_clean import clean_row
+from ticker_index import TickerIndex
+from work_queue import open_work_queue
+
+BASE_URL = "https://www.investing.com"
+# Сколько страниц листинга загружать заранее, пока разбираются статьи текущей
+LISTING_LOOKAHEAD = 1
+# Период опроса лент в режиме наблюдения, секунд
+DEFAULT_POLL_INTERVAL = 30
+# Дата публикации в листинге (article-publish-date) указана в UTC
+LISTING_TIMEZONE = timezone.utc
+# Сколько секунд процесс очереди ждет, когда все оставшиеся задачи у других процессов или в чужих шардах
+DEFAULT_IDLE_TIMEOUT = 60
+# Сколько последних замеров времени до записи держать для перцентилей
+INGEST_SAMPLES = 1000
+# Потоковая загрузка статей: размер куска и сколько недокачанного дочитать, чтобы сохранить соединение
+STREAM_CHUNK_SIZE = 16 * 1024
+STREAM_DRAIN_LIMIT = 64 * 1024
+# Потоковая загрузка читает тело сжатым, чтобы считать байты по сети, и распаковывает сама (content_decoder)
+STREAM_ACCEPT_ENCODING = 'gzip'
+
+# Колонки вывода: исторические схемы двух скриптов и полная для новых лент
+LATEST_FIELDS = ['title', 'link', 'content', 'related', 'author', 'published', 'updated']
+FOREX_FIELDS = ['title', 'link', 'content', 'related', 'author', 'publish_datetime']
+FEED_FIELDS = ['title', 'link', 'content', 'related', 'author', 'published', 'updated', 'publish_datetime']
+# Поля, которые проходят через clean_text (ссылка и дата из листинга пишутся как есть)
+CLEAN_FIELDS = ['title', 'content', 'related', 'author', 'published', 'updated']
+
+
+class FeedConfig:
+    """Лента новостей: откуда брать листинг и куда писать статьи
+
+    page_slice выбирает статьи с каждой страницы листинга (например,
+    slice(None, 40) - первые 40), max_articles ограничивает всю ленту за запуск.
+    Ленты с одинаковым output пишут в общий файл, схема у них должна совпадать.
+    """
+
+    def __init__(self, name, listing_path, output, fields=FEED_FIELDS, paginate=False,
+                 page_slice=None, max_articles=None, output_format=None):
+        self.name = name
+        self.listing_path = listing_path
+        self.output = output
+        self.fields = list(fields)
+        self.paginate = paginate
+        self.page_slice = page_slice
+        self.max_articles = max_articles
+        self.output_format = output_format
+
+    def replace(self, **changes):
+        """Копия настроек с измененными полями"""
+        return FeedConfig(**dict(vars(self), **changes))
+
+
+FEEDS = {
+    'latest': FeedConfig('latest', '/news/latest-news', 'articles.csv', LATEST_FIELDS,
+                         page_slice=slice(None, 40)),
+    'forex': FeedConfig('forex', '/news/forex-news', 'articles_forex.csv', FOREX_FIELDS,
+                        paginate=True, page_slice=slice(-35, None)),
+    'commodities': FeedConfig('commodities', '/news/commodities-news', 'articles_commodities.csv',
+                              paginate=True, page_slice=slice(-35, None)),
+    'crypto': FeedConfig('crypto', '/news/cryptocurrency-news', 'articles_crypto.csv',
+                         paginate=True, page_slice=slice(-35, None)),
+    'stock-market': FeedConfig('stock-market', '/news/stock-market-news', 'articles_stock_market.csv',
+                               paginate=True, page_slice=slice(-35, None)),
+}
+
+
+def parse_minutes_ago(text):
+    text = text.lower()
+    if 'minute' in text:
+        return int(re.search(r'(\d+)', text).group(1))
+    if 'hour' in text:
+        return int(re.search(r'(\d+)', text).group(1)) * 60
+    if 'just now' in text:
+        return 0
+    return 99999  # если не удалось распознать
+
+
+def content_decoder(content_encoding):
+    """Распаковщик тела по Content-Encoding: decompress(bytes) -> bytes, None - тело не сжато"""
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('', 'identity'):
+        return None
+    if encoding == 'gzip':
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    raise ValueError(f"Неожиданное сжатие ответа: {content_encoding}")
+
+
+def wire_bytes(resp, decoded):
+    """Байты тела по сети при обычной загрузке или None, если их не узнать
+
+    urllib3 считает их (tell()), только когда знает длину ответа; у chunked
+    без сжатия они совпадают с распакованными, у сжатого chunked неизвестны.
+    """
+    if resp.raw is not None and resp.raw.tell():
+        return resp.raw.tell()
+    if not resp.headers.get('Content-Encoding'):
+        return decoded
+    return None
+
+
+def fetch_article_stream(url, scraper, timeout=60):
+    """Загрузка статьи потоком: (ответ, html)
+
+    Тело читается как есть (сжатым, в том числе chunked), байты по сети
+    считаются по прочитанным кускам, а распакованное сразу идет в
+    ArticleStream. Как только все нужное для разбора получено, чтение
+    прекращается - хвост страницы со скриптами и подвалом не качается.
+    Недокачанный остаток до STREAM_DRAIN_LIMIT все же дочитывается, чтобы
+    соединение вернулось в пул; больший - соединение закрывается.
+    Сэкономленные байты печатаются и идут в метрики, если известен размер
+    ответа (Content-Length). У ответов chunked, как обычно отдает Cloudflare,
+    он неизвестен - экономию тогда показывает сравнение счетчика
+    article_wire_bytes с прогоном без потоковой загрузки.
+    """
+    resp = scraper.get(url, timeout=timeout, stream=True, headers={'Accept-Encoding': STREAM_ACCEPT_ENCODING})
+    with resp:
+        if resp.status_code != 200:
+            # Тело ошибки короткое; читаем его, пока соединение открыто, - по нему видна проверка Cloudflare
+            resp.content
+            return resp, None
+        if getattr(resp, 'from_cache', False):
+            return resp, resp.text
+        decoder = content_decoder(resp.headers.get('Content-Encoding'))
+        stream = ArticleStream(resp.encoding)
+        received = 0
+        chunks = resp.raw.stream(STREAM_CHUNK_SIZE, decode_content=False)
+        for chunk in chunks:
+            received += len(chunk)
+            data = decoder.decompress(chunk) if decoder else chunk
+            if data and stream.feed(data):
+                break
+        else:
+            if decoder:
+                data = decoder.flush()
+                if data:
+                    stream.feed(data)
+        length = resp.headers.get('Content-Length')
+        total = int(length) if length and length.isdigit() else None
+        if stream.done:
+            metrics.inc('stream_early_stops')
+            if total is not None and total - received <= STREAM_DRAIN_LIMIT:
+                for chunk in chunks:
+                    received += len(chunk)
+            if total is not None:
+                saved = total - received
+                metrics.inc('stream_bytes_saved', saved)
+                print(f"Потоковая загрузка: прочитано {received} из {total} байт, сэкономлено {saved}: {url}")
+            else:
+                metrics.inc('stream_unknown_length')
+                print(f"Потоковая загрузка: остановлена на {received} байт по сети "
+                      f"(распаковано {stream.received}), размер ответа неизвестен (chunked): {url}")
+        metrics.inc('stream_wire_bytes', received)
+        metrics.inc('stream_decoded_bytes', stream.received)
+        metrics.inc('article_wire_bytes', received)
+        metrics.inc('article_decoded_bytes', stream.received)
+        if isinstance(scraper, CachedSession):
+            # Прочитанное начало страницы годится для разбора: с ним статью соберет и --replay
+            scraper.store(url, resp, stream.content, encoding=stream.encoding, partial=stream.done)
+        return resp, stream.html
+
+
+def get_article_content_cloudscraper(url, scraper, engine=DEFAULT_ENGINE, browser_pool=None, parse=None,
+                                     stream=False):
+    """Получение содержимого статьи через cloudscraper, при отказе - через браузер из пула
+
+    В браузер статья уходит только при отказе Cloudflare или ограничении
+    темпа (rate_control.is_refusal): на 404 и ошибках сервера браузер не поможет.
+    parse(html, engine) заменяет parse_article, например разбором в пуле процессов.
+    С stream=True страница качается потоком до получения нужных частей (fetch_article_stream).
+    """
+    try:
+        print(f"Пытаемся получить контент через cloudscraper: {url}")
+        with metrics.timer('article_fetch'):
+            if stream:
+                resp, html = fetch_article_stream(url, scraper)
+            else:
+                resp = scraper.get(url, timeout=60)
+                html = resp.text if resp.status_code == 200 else None
+                if resp.status_code == 200 and not getattr(resp, 'from_cache', False):
+                    # Полная загрузка - для сравнения с потоковой
+                    decoded = len(resp.content)
+                    metrics.inc('article_decoded_bytes', decoded)
+                    wire = wire_bytes(resp, decoded)
+                    if wire is not None:
+                        metrics.inc('article_wire_bytes', wire)
+                    else:
+                        metrics.inc('article_wire_bytes_unknown')
+            status_code = resp.status_code
+        metrics.inc('http_responses', stage='article', status=status_code)
+        if status_code != 200 and browser_pool is not None and is_refusal(resp):
+            print(f"HTTP {status_code}, загружаем статью через браузер: {url}")
+            metrics.inc('browser_fetches', stage='article')
+            with metrics.timer('browser_fetch'):
+                html = browser_pool.fetch(url)
+        if html:
+            with metrics.timer('parse'):
+                parsed = (parse or parse_article)(html, engine)
+            if parsed:
+                return parsed
+            metrics.inc('extraction_misses')
+    except Exception as e:
+        metrics.inc('errors', stage='article', error=type(e).__name__)
+        print(f"Ошибка при получении контента через cloudscraper: {str(e)}")
+    return None, [], None, None, None
+
+
+def find_next_page(soup, page_num, listing_path):
+    """Поиск ссылки на следующую страницу листинга, возвращает (url, номер страницы)"""
+    next_link = None
+    # Новый способ поиска кнопки 'Next' по get_text(strip=True)
+    next_a = None
+    for a in soup.find_all('a', href=True):
+        if a.get_text(strip=True).lower() == 'next':
+            next_a = a
+            break
+    if next_a:
+        next_link = next_a['href']
+    else:
+        pagination = soup.find('div', class_=lambda x: x and 'flex' in x and 'gap-2' in x)
+        if pagination:
+            next_num = page_num + 1
+            for a in pagination.find_all('a', href=True):
+                try:
+                    if a.text.strip().isdigit() and int(a.text.strip()) == next_num:
+                        next_link = a['href']
+                        break
+                except Exception:
+                    continue
+
+    if next_link and not next_link.startswith('http'):
+        m = re.search(re.escape(listing_path) + r'/(\d+)', next_link)
+        if m:
+            return next_link, int(m.group(1))
+        return next_link, page_num + 1
+    return None, page_num
+
+
+def iter_listing_pages(scraper, base_url, page_url, paginate=True, lookahead=LISTING_LOOKAHEAD,
+                       listing_path=None, page_num=1, on_error=None):
+    """Страницы листинга (url, soup) с предзагрузкой следующих в фоновом потоке
+
+    Поток держит не больше lookahead страниц сверх той, что сейчас обрабатывается;
+    при lookahead=0 страницы качаются строго по очереди. Без paginate - только первая.
+    Листать можно и с середины: page_url и page_num - страница, с которой начинаем.
+    on_error() вызывается, если листинг оборвался из-за ошибки, а не кончился.
+    """
+    listing_path = listing_path or page_url
+    pages = queue.Queue()
+    slots = threading.Semaphore(lookahead + 1)
+    stop = threading.Event()
+
+    def wait_slot():
+        while not stop.is_set():
+            if slots.acquire(timeout=0.1):
+                return True
+        return False
+
+    def produce(page_url, page_num):
+        visited_pages = set()
+        try:
+            while page_url and page_url not in visited_pages and wait_slot():
+                visited_pages.add(page_url)
+                print(f"\nСобираем статьи со страницы: {base_url}{page_url}")
+                with metrics.timer('listing_fetch'):
+                    resp = scraper.get(f"{base_url}{page_url}", timeout=60)
+                metrics.inc('http_responses', stage='listing', status=resp.status_code)
+                if resp.status_code != 200:
+                    print(f"Ошибка при получении страницы: HTTP {resp.status_code}")
+                    if on_error:
+                        on_error()
+                    break
+                soup = BeautifulSoup(resp.text, 'html.parser')
+                pages.put((page_url, soup))
+                if not paginate:
+                    break
+                page_url, page_num = find_next_page(soup, page_num, listing_path)
+        except Exception as e:
+            metrics.inc('errors', stage='listing', error=type(e).__name__)
+            print(f"Ошибка при получении страницы: {str(e)}")
+            if on_error:
+                on_error()
+        finally:
+            pages.put(None)
+
+    producer = threading.Thread(target=produce, args=(page_url, page_num), name='listing', daemon=True)
+    producer.start()
+    try:
+        while True:
+            page = pages.get()
+            if page is None:
+                return
+            yield page
+            # Страница обработана - освобождаем место для следующей предзагрузки
+            slots.release()
+    finally:
+        stop.set()
+
+
+def iter_article_candidates(pages, base_url, seen, claim, page_slice=None, revised=None, schedule=None):
+    """Новые кандидаты (title, link, publish_datetime) со страниц листинга
+
+    Статьи из индекса seen пропускаются; если на странице все статьи уже
+    известны, дальше листать незачем - остальное собрано прошлыми запусками.
+    claim(link) отсеивает статьи, которые уже в работе у этой или другой ленты.
+    revised([(link, publish_datetime)]) возвращает собранные статьи, которые
+    стоит загрузить снова: в листинге у них дата новее сохраненной.
+    С schedule (CrawlSchedule) вместо page_slice статьи страницы берутся от
+    новых к старым и не старше отметки, листание кончается на статьях старше
+    нее, а новые кандидаты не выдаются после крайнего срока.
+    """
+    for page_url, soup in pages:
+        if schedule and schedule.expired():
+            print("Время на обход вышло, дальше не листаем")
+            return
+        articles = soup.find_all('article', attrs={'data-test': 'article-item'})
+        if not articles:
+            print("Статей не найдено на странице!")
+            return
+        print(f"Найдено статей на странице: {len(articles)}")
+
+        page_candidates = []
+        for article in articles[page_slice] if page_slice else articles:
+            try:
+                title_element = article.find('a', attrs={'data-test': 'article-title-link'})
+                publish_datetime = None
+                time_tag = article.find('time', attrs={'data-test': 'article-publish-date'})
+                if time_tag and time_tag.has_attr('datetime'):
+                    publish_datetime = time_tag['datetime']
+                if title_element:
+                    title = title_element.text.strip()
+                    link = title_element['href']
+                    if not link.startswith('http'):
+                        link = base_url + link
+                    page_candidates.append((title, link, publish_datetime))
+            except Exception as e:
+                metrics.inc('errors', stage='listing_item', error=type(e).__name__)
+                continue
+
+        reached_watermark = False
+        if schedule:
+            page_candidates, reached_watermark = schedule.select(page_candidates)
+
+        known = seen.known(link for _, link, _ in page_candidates)
+        if revised and known:
+            refetch = revised([(link, publish_datetime) for _, link, publish_datetime in page_candidates
+                               if link in known])
+            if refetch:
+                print(f"Статьи с новой датой в листинге, загружаем снова: {len(refetch)}")
+                known -= refetch
+        if page_candidates and len(known) == len({link for _, link, _ in page_candidates}):
+            print("Все статьи страницы уже собраны, дальше не листаем")
+            if schedule:
+                schedule.covered = True
+            return
+        if known:
+            print(f"Пропускаем уже собранные статьи: {len(known)}")
+            metrics.inc('articles_skipped', len(known), reason='seen')
+        for title, link, publish_datetime in page_candidates:
+            if link in known:
+                continue
+            if schedule and schedule.expired():
+                print("Время на обход вышло, новые статьи больше не берем")
+                return
+            if claim(link):
+                yield title, link, publish_datetime
+            else:
+                metrics.inc('articles_skipped', reason='in_progress')
+                if schedule:
+                    # Статью качает другая лента; не соберет - отметка этой ленты не должна ее перескочить
+                    schedule.miss(publish_datetime)
+        if reached_watermark:
+            print("Дальше статьи старше отметки, не листаем")
+            schedule.covered = True
+            return
+    if schedule:
+        schedule.covered = True
+
+
+def iter_article_records(candidates, scraper, max_per_host=DEFAULT_MAX_PER_HOST, limiter=None,
+                         release=None, label='', browser_pool=None, parse=None, stream=False, schedule=None,
+                         engine=DEFAULT_ENGINE):
+    """Статьи, скачанные и разобранные параллельно, в порядке листинга
+
+    Одновременно в работе не больше max_per_host статей, так что память
+    не зависит от глубины пагинации. Для статей без контента вызывается
+    release([link]), а с schedule они отмечаются в нем как несобранные.
+    """
+    contents = map_ordered(
+        lambda candidate: get_article_content_cloudscraper(candidate[1], scraper, engine,
+                                                           browser_pool=browser_pool, parse=parse, stream=stream),
+        candidates,
+        max_per_host=max_per_host,
+        limiter=limiter,
+        url_of=lambda candidate: candidate[1],
+    )
+    for (title, link, publish_datetime), (content, related, author, published, updated) in contents:
+        print(f"\n{label}Обрабатываем: {title}")
+        print(f"URL статьи: {link}")
+        if content:
+            print("Статья успешно обработана")
+            yield {
+                'title': title,
+                'link': link,
+                'content': content,
+                'related': related,
+                'author': author,
+                'published': published,
+                'updated': updated,
+                'publish_datetime': publish_datetime
+            }
+        else:
+            print("Не удалось получить контент статьи")
+            metrics.inc('articles_skipped', reason='no_content')
+            if release:
+                release([link])
+            if schedule:
+                schedule.miss(publish_datetime)
+
+
+def print_article(idx, article):
+    """Вывод собранной статьи в консоль"""
+    print(f"\n#{idx}: {article['title']}")
+    print(f"Ссылка: {article['link']}")
+    print(f"Контент: {article['content']}")
+    print("Связанные инструменты:")
+    for related in article['related']:
+        print(f" - {related['ticker']} ({related['url']})")
+    print(f"Автор: {article['author']}")
+    print(f"Опубликовано: {article.get('published')}")
+    print(f"Обновлено: {article.get('updated')}")
+    print(f"Дата публикации: {article.get('publish_datetime')}")
+    print("-" * 80)
+
+
+class IngestStats:
+    """Время от публикации статьи (по листингу) до записи строки в файл"""
+
+    def __init__(self, max_samples=INGEST_SAMPLES):
+        self.count = 0
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.count += 1
+            self._samples.append(seconds)
+
+    def summary(self):
+        """Перцентили по последним замерам, секунды"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))], 1)
+        return {'count': self.count, 'p50': percentile(0.5), 'p90': percentile(0.9), 'max': round(samples[-1], 1)}
+
+
+def parse_listing_datetime(value):
+    """Дата публикации из листинга как timestamp, None если не разобрать"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=LISTING_TIMEZONE).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class CrawlSchedule:
+    """Рамки обхода ленты по времени вместо фиксированного числа статей
+
+    watermark - время публикации (timestamp), старше которого статьи не нужны,
+    например собранное прошлым запуском; deadline - крайний срок по
+    time.monotonic(), после которого новые загрузки не начинаются. covered
+    выставляется, когда лента просмотрена до отметки (или до конца) без
+    ошибок и досрочной остановки: только тогда отметку можно сдвигать.
+    Статьи, которые не удалось собрать, отмечаются через miss(): отметка
+    не сдвинется дальше самой старой из них, и следующий запуск их повторит.
+    """
+
+    def __init__(self, watermark=None, deadline=None):
+        self.watermark = watermark
+        self.deadline = deadline
+        self.covered = False
+        self.failed = False
+        self.oldest_missed = None
+        self._lock = threading.Lock()
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def fail(self):
+        self.failed = True
+
+    def miss(self, publish_datetime):
+        """Статья с такой датой из листинга не собрана"""
+        published_at = parse_listing_datetime(publish_datetime)
+        if published_at is None:
+            # Без даты не понять, до какого места сдвигать отметку - не сдвигаем вовсе
+            self.fail()
+            return
+        with self._lock:
+            if self.oldest_missed is None or published_at < self.oldest_missed:
+                self.oldest_missed = published_at
+
+    def next_watermark(self, newest):
+        """Новая отметка после обхода, где самая свежая собранная статья - newest; None - не сдвигать"""
+        if not self.covered or self.failed or newest is None:
+            return None
+        if self.oldest_missed is not None:
+            # Несобранные статьи должны остаться новее отметки (select берет published_at >= отметки)
+            newest = min(newest, self.oldest_missed)
+        if self.watermark is not None and newest <= self.watermark:
+            return None
+        return newest
+
+    def select(self, candidates):
+        """Кандидаты страницы не старше отметки, от новых к старым; и были ли на ней старше отметки
+
+        Статьи без даты считаются свежими: по ним не понять, собраны ли они раньше.
+        """
+        dated = [(parse_listing_datetime(candidate[2]), candidate) for candidate in candidates]
+        fresh = [(published_at, candidate) for published_at, candidate in dated
+                 if self.watermark is None or published_at is None or published_at >= self.watermark]
+        fresh.sort(key=lambda item: item[0] if item[0] is not None else float('inf'), reverse=True)
+        return [candidate for _, candidate in fresh], len(fresh) < len(dated)
+
+
+class Crawler:
+    """Обход нескольких лент в одном процессе
+
+    Ленты идут параллельно, каждая в своем потоке, но делят сессию Cloudflare,
+    пул соединений, лимит на хост, регулятор темпа и индекс собранных статей.
+    Статья, которую уже качает одна лента, другими пропускается.
+    С budget (секунды на обход) или since (дата '%Y-%m-%d %H:%M:%S' в UTC или
+    'last' - отметка прошлого запуска ленты) объем обхода задает CrawlSchedule,
+    а не срезы page_slice.
+    run() обходит ленты один раз, watch() - опрашивает их, пока не остановят,
+    work() - берет листинги и статьи из общей с другими процессами очереди.
+    """
+
+    def __init__(self, feeds, max_per_host=DEFAULT_MAX_PER_HOST, lookahead=LISTING_LOOKAHEAD,
+                 seen_index_path=DEFAULT_INDEX_PATH, cache_dir=None, replay=False, fsync=False,
+                 print_articles=False, session_file=DEFAULT_SESSION_FILE, rate=DEFAULT_INITIAL_RATE,
+                 browsers=0, browser_fallback=True, parse_workers=0, stream=False, article_store=None,
+                 ticker_index=None, budget=None, since=None, engine=DEFAULT_ENGINE, stats_file=None,
+                 stats_interval=None, base_url=BASE_URL):
+        self.feeds = list(feeds)
+        self.max_per_host = max_per_host
+        self.lookahead = lookahead
+        self.seen_index_path = seen_index_path
+        self.cache_dir = cache_dir
+        self.replay = replay
+        self.fsync = fsync
+        self.print_articles = print_articles
+        self.session_file = session_file
+        self.rate = rate
+        self.browsers = browsers
+        self.browser_fallback = browser_fallback
+        self.parse_workers = parse_workers
+        self.stream = stream
+        self.article_store = article_store
+        self.ticker_index_path = ticker_index
+        self.budget = budget
+        self.since = since
+        if since not in (None, 'last') and parse_listing_datetime(since) is None:
+            raise ValueError(f"Дата since должна быть в формате YYYY-MM-DD HH:MM:SS или 'last': {since}")
+        if engine not in ENGINES:
+            raise ValueError(f"Неизвестный движок разбора: {engine}")
+        self.engine = engine
+        self.stats_file = stats_file
+        self.stats_interval = stats_interval
+        self.base_url = base_url
+        self.written = {feed.name: 0 for feed in self.feeds}
+        self.session_manager = None
+        self.rate_controller = None
+        self.scraper = None
+        self.limiter = None
+        self.browser_pool = None
+        self.parse_pool = None
+        self.work_queue = None
+        self.seen = None
+        self.store = None
+        self.ticker_index = None
+        self.sinks = {}
+        self.ingest = IngestStats()
+        # Ссылка -> (время публикации, лента) для замера времени до записи
+        self._published_at = {}
+        self._task_ids = {}
+        self._stored = {}
+        self._refetch = set()
+        self._deadline = None
+        self._written_lock = threading.Lock()
+        self._claimed = set()
+        self._claims_lock = threading.Lock()
+        self._print_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        # Сессия cloudscraper с сохраненными cookies Cloudflare; проверка проходится только при необходимости
+        self.session_manager = SessionManager(self.base_url + self.feeds[0].listing_path, path=self.session_file)
+        scraper = self.session_manager.start(warm=not self.replay)
+        # Пул соединений под число параллельных загрузок статей
+        size_connection_pool(scraper, self.max_per_host)
+        # Темп и параллельность подстраиваются под ответы сайта: растут, пока он отвечает быстро,
+        # и падают на 429/503 и проверках Cloudflare; кэш стоит снаружи, попадания в него не тормозятся
+        self.rate_controller = AdaptiveRateController(self.max_per_host, initial_rate=self.rate)
+        scraper = RateLimitedSession(scraper, self.rate_controller)
+        if self.cache_dir or self.replay:
+            # Кэш ответов на диске; в режиме replay сеть не используется вовсе
+            scraper = CachedSession(scraper, self.cache_dir or DEFAULT_CACHE_DIR, replay=self.replay)
+        self.scraper = scraper
+        # Общий на все ленты лимит одновременных запросов к хосту
+        self.limiter = HostLimiter(self.max_per_host)
+        if self.parse_workers:
+            # Разбор в отдельных процессах, чтобы он не делил одно ядро с загрузкой
+            self.parse_pool = ParsePool(self.parse_workers, engine=self.engine)
+        if self.browser_fallback and not self.replay:
+            # Запасной путь через headless Chrome; cookies после проверки уходят в HTTP-сессию.
+            # Без --browsers браузер запускается при первой необходимости, с ним - заранее
+            self.browser_pool = BrowserPool(size=max(self.browsers, 1), on_cookies=self.session_manager.adopt)
+            if self.browsers:
+                self.browser_pool.prewarm(self.base_url + self.feeds[0].listing_path)
+        if self.stats_file and self.stats_interval:
+            # Статистика по этапам на диске обновляется и во время работы, не только в конце
+            metrics.write_periodically(self.stats_file, self.stats_interval)
+        # Индекс статей, собранных прошлыми запусками. В replay - пустой в памяти: повторный
+        # разбор кэша (например, после правки селекторов) должен пройти по всем статьям и не
+        # трогать рабочий индекс
+        self.seen = SeenIndex(':memory:' if self.replay else self.seen_index_path)
+        if self.article_store:
+            self.store = ArticleStore(self.article_store)
+        if self.ticker_index_path:
+            self.ticker_index = TickerIndex(self.ticker_index_path)
+        # Файлы вывода открыты на весь запуск, строки пишутся пачками; в индекс попадают только записанные
+        for feed in self.feeds:
+            sink = self.sinks.get(feed.output)
+            if sink is None:
+                self.sinks[feed.output] = open_sink(feed.output, feed.fields, fmt=feed.output_format,
+                                                    fsync=self.fsync, on_flush=self._on_flush)
+            elif sink.fieldnames != feed.fields:
+                raise ValueError(f"Ленты с общим файлом {feed.output} должны иметь одинаковые поля")
+
+    def close(self):
+        for sink in self.sinks.values():
+            sink.close()
+        if self.browser_pool:
+            self.browser_pool.close()
+        if self.parse_pool:
+            self.parse_pool.close()
+        if self.seen:
+            self.seen.close()
+        if self.store:
+            self.store.close()
+        if self.ticker_index:
+            self.ticker_index.close()
+        if self.session_manager:
+            self.session_manager.stop()
+        if self.rate_controller:
+            print(f"Темп запросов в конце: {self.rate_controller.stats()}")
+        if self.stats_file:
+            metrics.stop()
+            metrics.write(self.stats_file)
+            print(f"Статистика по этапам записана в {self.stats_file}")
+
+    def _on_flush(self, rows):
+        rows = list(rows)
+        if self.store:
+            # В хранилище статья попадает только после записи в файл: запуск, упавший
+            # до сброса, соберет ее снова, а не посчитает неизменной
+            self.store.upsert_many([
+                record for record in (self._stored.pop(row['link'], None) for row in rows) if record
+            ])
+        if self.ticker_index:
+            # Время публикации из листинга; без него индекс возьмет время записи
+            self.ticker_index.add_many(
+                (row['link'], row.get('title'), self._published_at.get(row['link'], (None,))[0], row.get('related'))
+                for row in rows
+            )
+        self.seen.add_many((row['link'], row.get('published', row.get('publish_datetime'))) for row in rows)
+        # Записанные статьи теперь отсеивает индекс, держать их в памяти больше незачем
+        self._release(row['link'] for row in rows)
+        if self.work_queue:
+            # Задача статьи закрывается только после того, как строка оказалась в файле
+            self.work_queue.complete([
+                task_id for task_id in (self._task_ids.pop(row['link'], None) for row in rows) if task_id
+            ])
+        now = time.time()
+        for row in rows:
+            published_at, feed_name = self._published_at.pop(row['link'], (None, None))
+            if published_at is not None:
+                self.ingest.add(now - published_at)
+                metrics.observe('time_to_ingest', now - published_at, buckets=INGEST_BUCKETS, feed=feed_name)
+
+    def _claim(self, link):
+        """Берем статью в работу, если ее не качает другая лента и она не собрана раньше"""
+        with self._claims_lock:
+            if link in self._claimed or (link in self.seen and link not in self._refetch):
+                return False
+            self._claimed.add(link)
+            return True
+
+    def _release(self, links):
+        links = list(links)
+        with self._claims_lock:
+            self._claimed.difference_update(links)
+            self._refetch.difference_update(links)
+
+    def _revised(self, candidates):
+        """Собранные статьи, которые надо загрузить снова (см. ArticleStore.revised)"""
+        revised = self.store.revised(candidates)
+        with self._claims_lock:
+            self._refetch.update(revised)
+        return revised
+
+    def run(self):
+        """Обходим все ленты параллельно, возвращаем {имя ленты: собрано статей}"""
+        try:
+            self.start()
+            self._crawl_feeds()
+        finally:
+            self.close()
+        return self.written
+
+    def watch(self, interval=DEFAULT_POLL_INTERVAL):
+        """Опрашиваем ленты каждые interval секунд и забираем только новые статьи
+
+        Сессия, пул и индекс живут весь запуск, так что повторный опрос стоит
+        одного запроса листинга на ленту (с --cache-dir - условного, часто 304).
+        Останавливается по Ctrl+C.
+        """
+        try:
+            self.start()
+            while not self._stop.is_set():
+                started = time.monotonic()
+                self._crawl_feeds()
+                # Дописываем новые строки сразу, не дожидаясь таймера приемника
+                for sink in self.sinks.values():
+                    sink.flush()
+                self.report_ingest()
+                self._stop.wait(max(0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            print("\nОстанавливаем наблюдение, дописываем собранное...")
+            self._stop.set()
+        finally:
+            self.close()
+        return self.written
+
+    def report_ingest(self):
+        summary = self.ingest.summary()
+        if summary:
+            print(f"Время от публикации до записи, с: {summary}")
+
+    def _crawl_feeds(self):
+        # Бюджет времени общий на все ленты и отсчитывается заново на каждый опрос
+        self._deadline = time.monotonic() + self.budget if self.budget else None
+        threads = [
+            threading.Thread(target=self._run_feed, args=(feed,), name=f'feed-{feed.name}', daemon=True)
+            for feed in self.feeds
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                # join с таймаутом, чтобы Ctrl+C доходил до основного потока
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            print("\nОстанавливаем сбор, дописываем собранное...")
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _run_feed(self, feed):
+        try:
+            self.crawl_feed(feed)
+        except Exception as e:
+            metrics.inc('errors', stage='feed', error=type(e).__name__)
+            print(f"\n[{feed.name}] Критическая ошибка: {str(e)}")
+            print("Попробуйте:")
+            print("1. Запустить скрипт снова")
+            print("2. Использовать VPN/прокси")
+            print("3. Ввести капчу вручную (если появится)")
+
+    def _parse(self, html, engine=DEFAULT_ENGINE):
+        if self.parse_pool:
+            return self.parse_pool.parse(html, engine)
+        return parse_article(html, engine)
+
+    def _write_article(self, feed, article, schedule=None):
+        """Очистка и запись статьи в файл ленты; False, если не вышло
+
+        Неудача отмечается в schedule как несобранная статья: отметка ее не перескочит.
+        """
+        try:
+            # Сохраняем в файл вывода только колонки ленты
+            with metrics.timer('clean'):
+                cleaned = clean_row(article, CLEAN_FIELDS)
+            if self.store and not self._store_change(feed, cleaned):
+                return False
+            published_at = parse_listing_datetime(article['publish_datetime'])
+            if published_at is not None:
+                self._published_at[article['link']] = (published_at, feed.name)
+            with metrics.timer('write'):
+                self.sinks[feed.output].write({field: cleaned.get(field) for field in feed.fields})
+        except Exception as e:
+            metrics.inc('errors', stage='write', error=type(e).__name__)
+            print(f"Ошибка при обработке статьи: {str(e)}")
+            self._release([article['link']])
+            self._published_at.pop(article['link'], None)
+            self._stored.pop(article['link'], None)
+            if schedule:
+                schedule.miss(article['publish_datetime'])
+            return False
+        metrics.inc('articles_written', feed=feed.name)
+        with self._written_lock:
+            self.written[feed.name] += 1
+            idx = self.written[feed.name]
+        if self.print_articles:
+            with self._print_lock:
+                print_article(idx, article)
+        return True
+
+    def _store_change(self, feed, cleaned):
+        """Сверяем статью с хранилищем; False - она не изменилась и писать ее не нужно"""
+        link = cleaned['link']
+        change = self.store.change(cleaned)
+        if change == UNCHANGED:
+            # Только отмечаем проверку; строка с этой версией уже есть в файле
+            self.store.upsert(cleaned)
+            metrics.inc('articles_skipped', reason='unchanged')
+            self._release([link])
+            task_id = self._task_ids.pop(link, None)
+            if task_id:
+                self.work_queue.complete([task_id])
+            return False
+        if change == UPDATED:
+            metrics.inc('articles_updated', feed=feed.name)
+            print(f"[{feed.name}] Статья изменилась, записываем новую версию: {link}")
+        self._stored[link] = cleaned
+        return True
+
+    def work(self, work_queue, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        """Сбор через общую очередь задач, которую делят процессы
+
+        Первые страницы лент кладутся в очередь (уже бывшие там не добавляются
+        повторно - очередь рассчитана на один обход, например бэкфилл).
+        Дальше процесс берет задачи в аренду: листинг дает задачи статей и
+        следующей страницы, статья пишется в файл своей ленты, а задача
+        закрывается, когда строка записана. Порядок листинга здесь не
+        сохраняется. Выходим, когда в очереди не осталось невыполненных задач
+        или когда idle_timeout секунд взять было нечего, а оставшиеся задачи -
+        в аренде у других процессов или в чужих шардах (None - ждать их всегда).
+        budget и since здесь не поддерживаются: отметка и срок - на процесс,
+        а листинг делят все процессы очереди.
+        """
+        if self.budget is not None or self.since is not None:
+            raise ValueError("budget и since не работают с общей очередью задач")
+        self.work_queue = work_queue
+        feeds = {feed.name: feed for feed in self.feeds}
+        names = list(feeds)
+        try:
+            self.start()
+            work_queue.put_many(
+                ('listing', self.base_url + feed.listing_path, feed.name, {'page': 1}) for feed in self.feeds
+            )
+            in_flight = set()
+            renewed = time.monotonic()
+            idle_since = None
+            with ThreadPoolExecutor(max_workers=self.max_per_host, thread_name_prefix='task') as executor:
+                try:
+                    while not self._stop.is_set():
+                        if time.monotonic() - renewed >= work_queue.lease_seconds / 3:
+                            # Статьи в буфере приемника (Parquet держит до 1000 строк) еще не закрыты -
+                            # продлеваем аренду, чтобы их не взял заново этот или другой процесс
+                            work_queue.renew(list(self._task_ids.values()))
+                            renewed = time.monotonic()
+                        free = self.max_per_host - len(in_flight)
+                        for task in work_queue.lease(limit=free, feeds=names) if free else []:
+                            in_flight.add(executor.submit(self._run_task, feeds[task.feed], task))
+                        if not in_flight:
+                            # Задачи статей закрываются при сбросе приемника; без сброса
+                            # недописанные строки держали бы очередь невыполненной
+                            for sink in self.sinks.values():
+                                sink.flush()
+                            pending = work_queue.pending(names)
+                            if not pending:
+                                break
+                            # Оставшиеся задачи в аренде у других процессов или в чужих шардах:
+                            # ждем, вдруг их добавят в наш шард или аренда истечет
+                            now = time.monotonic()
+                            idle_since = idle_since or now
+                            if idle_timeout is not None and now - idle_since >= idle_timeout:
+                                print(f"Взять нечего уже {idle_timeout:.0f} с, выходим; "
+                                      f"осталось задач у других процессов или в чужих шардах: {pending}")
+                                break
+                            if int(now - idle_since) % 10 == 0:
+                                print(f"Ждем задачи других процессов или шардов: {pending}")
+                            self._stop.wait(1)
+                            continue
+                        idle_since = None
+                        _, in_flight = wait(in_flight, timeout=1, return_when=FIRST_COMPLETED)
+                except KeyboardInterrupt:
+                    print("\nОстанавливаем сбор, дописываем собранное...")
+                    self._stop.set()
+        finally:
+            self.close()
+            print(f"Очередь задач: {work_queue.stats()}")
+        return self.written
+
+    def _run_task(self, feed, task):
+        try:
+            if task.kind == 'listing':
+                self._run_listing_task(feed, task)
+            else:
+                self._run_article_task(feed, task)
+        except Exception as e:
+            metrics.inc('errors', stage=task.kind, error=type(e).__name__)
+            print(f"[{feed.name}] Ошибка задачи {task.url}: {str(e)}")
+            self.work_queue.fail([task.id])
+
+    def _run_listing_task(self, feed, task):
+        print(f"\nСобираем статьи со страницы: {task.url}")
+        with metrics.timer('listing_fetch'):
+            resp = self.scraper.get(task.url, timeout=60)
+        metrics.inc('http_responses', stage='listing', status=resp.status_code)
+        if resp.status_code != 200:
+            print(f"Ошибка при получении страницы: HTTP {resp.status_code}")
+            self.work_queue.fail([task.id])
+            return
+        soup = BeautifulSoup(resp.text, 'html.parser')
+        # Повторы между процессами отсекает сама очередь, поэтому claim всегда согласен
+        candidates = list(iter_article_candidates([(urlsplit(task.url).path, soup)], self.base_url, self.seen,
+                                                  lambda link: True, feed.page_slice,
+                                                  revised=self.store and self.store.revised))
+        new_tasks = [
+            ('article', link, feed.name, {'title': title, 'publish_datetime': publish_datetime})
+            for title, link, publish_datetime in candidates
+        ]
+        # Страница, где все уже собрано, пагинацию не продолжает - как в обычном обходе
+        if candidates and feed.paginate:
+            next_url, next_num = find_next_page(soup, task.payload.get('page', 1), feed.listing_path)
+            if next_url:
+                new_tasks.append(('listing', self.base_url + next_url, feed.name, {'page': next_num}))
+        added = self.work_queue.put_many(new_tasks)
+        print(f"[{feed.name}] В очередь добавлено задач: {added}")
+        self.work_queue.complete([task.id])
+
+    def _run_article_task(self, feed, task):
+        content, related, author, published, updated = get_article_content_cloudscraper(
+            task.url, self.scraper, self.engine, browser_pool=self.browser_pool, parse=self._parse,
+            stream=self.stream
+        )
+        if not content:
+            metrics.inc('articles_skipped', reason='no_content')
+            self.work_queue.fail([task.id])
+            return
+        article = {
+            'title': task.payload['title'],
+            'link': task.url,
+            'content': content,
+            'related': related,
+            'author': author,
+            'published': published,
+            'updated': updated,
+            'publish_datetime': task.payload['publish_datetime']
+        }
+        # До записи: сброс приемника может случиться прямо внутри write
+        self._task_ids[task.url] = task.id
+        # Неизмененную статью _write_article сам закрывает в очереди
+        if not self._write_article(feed, article) and self._task_ids.pop(task.url, None):
+            self.work_queue.fail([task.id])
+
+    def _browse_listing(self, feed):
+        """Первая страница листинга через браузер из пула, когда cloudscraper не справился"""
+        if self.browser_pool is None:
+            print(f"[{feed.name}] Не удалось получить статьи листинга")
+            return None
+        print(f"[{feed.name}] Не удалось получить статьи через cloudscraper, пробуем через браузер...")
+        metrics.inc('browser_fetches', stage='listing')
+        with metrics.timer('browser_fetch'):
+            html = self.browser_pool.fetch(self.base_url + feed.listing_path)
+        return feed.listing_path, BeautifulSoup(html, 'html.parser')
+
+    def crawl_feed(self, feed):
+        """Конвейер одной ленты: листинг (с опережением) -> ссылки -> загрузка и разбор -> запись
+
+        Каждая стадия - генератор с ограниченной очередью, статьи в памяти не копятся.
+        """
+        written = 0
+        schedule = self._schedule(feed)
+        newest = None
+        pages = iter_listing_pages(self.scraper, self.base_url, feed.listing_path,
+                                   paginate=feed.paginate, lookahead=self.lookahead,
+                                   on_error=schedule and schedule.fail)
+        try:
+            first_page = next(pages, None)
+            if first_page is None or not first_page[1].find('article', attrs={'data-test': 'article-item'}):
+                pages.close()
+                first_page = self._browse_listing(feed)
+                if first_page is None:
+                    return 0
+                # Остальные страницы - снова через HTTP-сессию, с cookies из браузера
+                next_url, next_num = (find_next_page(first_page[1], 1, feed.listing_path)
+                                      if feed.paginate else (None, 1))
+                pages = iter_listing_pages(self.scraper, self.base_url, next_url, lookahead=self.lookahead,
+                                           listing_path=feed.listing_path, page_num=next_num,
+                                           on_error=schedule and schedule.fail)
+            candidates = iter_article_candidates(itertools.chain([first_page], pages), self.base_url,
+                                                 self.seen, self._claim, None if schedule else feed.page_slice,
+                                                 revised=self.store and self._revised, schedule=schedule)
+            if feed.max_articles:
+                candidates = itertools.islice(candidates, feed.max_articles)
+            records = iter_article_records(candidates, self.scraper, self.max_per_host, self.limiter,
+                                           release=self._release, label=f"[{feed.name}] ",
+                                           browser_pool=self.browser_pool, parse=self._parse,
+                                           stream=self.stream, schedule=schedule, engine=self.engine)
+            try:
+                for article in records:
+                    if self._stop.is_set():
+                        break
+                    if self._write_article(feed, article, schedule):
+                        written += 1
+                        published_at = parse_listing_datetime(article['publish_datetime'])
+                        if published_at is not None and (newest is None or published_at > newest):
+                            newest = published_at
+            finally:
+                records.close()
+        finally:
+            pages.close()
+        print(f"\n[{feed.name}] Успешно собрано статей: {written}")
+        if schedule:
+            self._finish_schedule(feed, schedule, newest)
+        return written
+
+    def _schedule(self, feed):
+        """Рамки обхода ленты или None, если объем задают срезы page_slice"""
+        if self.budget is None and self.since is None:
+            return None
+        if self.since == 'last':
+            watermark = self.seen.watermark(feed.name)
+        else:
+            watermark = parse_listing_datetime(self.since)
+        if watermark is not None:
+            print(f"[{feed.name}] Собираем статьи новее "
+                  f"{datetime.fromtimestamp(watermark, LISTING_TIMEZONE):%Y-%m-%d %H:%M:%S}")
+        return CrawlSchedule(watermark, self._deadline)
+
+    def _finish_schedule(self, feed, schedule, newest):
+        if schedule.expired():
+            metrics.inc('budget_exhausted', feed=feed.name)
+            print(f"[{feed.name}] Бюджет {self.budget} с исчерпан, самые свежие статьи собраны первыми")
+        if self._stop.is_set():
+            # Между собранным и старой отметкой могли остаться статьи - отметку не двигаем
+            return
+        watermark = schedule.next_watermark(newest)
+        if schedule.oldest_missed is not None:
+            print(f"[{feed.name}] Часть статей не собрана, отметка не дальше "
+                  f"{datetime.fromtimestamp(schedule.oldest_missed, LISTING_TIMEZONE):%Y-%m-%d %H:%M:%S}")
+        if watermark is not None:
+            # Отметка сдвигается только после того, как статьи оказались в файле
+            self.sinks[feed.output].flush()
+            self.seen.set_watermark(feed.name, watermark)
+
+
+def add_crawler_arguments(parser):
+    """Общие для всех скриптов сбора параметры командной строки"""
+    parser.add_argument('--max-per-host', type=int, default=DEFAULT_MAX_PER_HOST,
+                        help="максимум одновременных запросов к одному хосту")
+    parser.add_argument('--lookahead', type=int, default=LISTING_LOOKAHEAD,
+                        help="сколько страниц листинга загружать заранее")
+    parser.add_argument('--seen-index', default=DEFAULT_INDEX_PATH,
+                        help="файл индекса уже собранных статей")
+    parser.add_argument('--article-store', default=None,
+                        help="хранилище статей с историей правок (SQLite): измененные статьи загружаются и "
+                             "пишутся снова, неизмененные пропускаются")
+    parser.add_argument('--ticker-index', default=None,
+                        help="индекс инструмент -> статьи (SQLite), запросы к нему - ticker_index.py")
+    parser.add_argument('--cache-dir', default=None,
+                        help=f"каталог кэша HTTP-ответов (например {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--replay', action='store_true',
+                        help="брать страницы только из кэша, без обращения к сайту; индекс собранных "
+                             "статей не используется и не обновляется")
+    parser.add_argument('--fsync', action='store_true',
+                        help="принудительно сбрасывать вывод на диск после каждой пачки строк")
+    parser.add_argument('--print-articles', action='store_true',
+                        help="печатать каждую собранную статью в консоль")
+    parser.add_argument('--session-file', default=DEFAULT_SESSION_FILE,
+                        help="файл с сохраненной сессией Cloudflare (cookies и заголовки)")
+    parser.add_argument('--rate', type=float, default=DEFAULT_INITIAL_RATE,
+                        help="стартовый темп запросов в секунду, дальше подстраивается под ответы сайта")
+    parser.add_argument('--browsers', type=int, default=0,
+                        help="сколько headless Chrome держать прогретыми для запасного пути (0 - запускать по необходимости)")
+    parser.add_argument('--no-browser', action='store_true',
+                        help="не использовать headless Chrome как запасной путь")
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help="адрес сайта (например, локальный стенд из benchmarks/standin_server.py)")
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help="разбирать страницы в стольких процессах (0 - в потоках загрузки)")
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE,
+                        help="разбор статей: lxml (быстрый) или bs4 (эталонный html.parser за один обход)")
+    parser.add_argument('--stream', action='store_true',
+                        help="качать статьи потоком и обрывать загрузку, как только получено все нужное для разбора")
+    parser.add_argument('--budget', type=float, default=None,
+                        help="секунд на обход всех лент: свежие статьи первыми, после срока новые не берутся")
+    parser.add_argument('--since', default=None,
+                        help="брать статьи не старше этой даты UTC (YYYY-MM-DD HH:MM:SS) или 'last' - "
+                             "новее собранного прошлым запуском; листание кончается на более старых")
+    parser.add_argument('--work-queue', default=None,
+                        help="общая очередь задач (файл SQLite или sqlite:///путь) для сбора несколькими процессами; "
+                             "не совмещается с --budget и --since")
+    parser.add_argument('--shard', default=None,
+                        help="доля задач очереди для этого процесса в виде номер/всего, например 0/4")
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="выйти из режима очереди, если столько секунд все оставшиеся задачи "
+                             "у других процессов или в чужих шардах")
+    parser.add_argument('--stats-file', default=None,
+                        help="файл статистики по этапам: .prom/.txt - формат Prometheus, иначе JSON")
+    parser.add_argument('--stats-interval', type=float, default=None,
+                        help="обновлять файл статистики каждые столько секунд (по умолчанию - только в конце)")
+    parser.add_argument('--profile', default=None,
+                        help="записать профиль cProfile всего запуска в этот файл")
+    parser.add_argument('--watch', action='store_true',
+                        help="не завершаться, а опрашивать ленты и забирать новые статьи по мере появления")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="период опроса лент в режиме --watch, секунд")
+
+
+def crawler_options(args):
+    """Параметры run_feeds из разобранной командной строки"""
+    return {
+        'max_per_host': args.max_per_host,
+        'lookahead': args.lookahead,
+        'seen_index_path': args.seen_index,
+        'cache_dir': args.cache_dir,
+        'replay': args.replay,
+        'fsync': args.fsync,
+        'print_articles': args.print_articles,
+        'session_file': args.session_file,
+        'rate': args.rate,
+        'browsers': args.browsers,
+        'browser_fallback': not args.no_browser,
+        'parse_workers': args.parse_workers,
+        'stream': args.stream,
+        'engine': args.engine,
+        'budget': args.budget,
+        'since': args.since,
+        'article_store': args.article_store,
+        'ticker_index': args.ticker_index,
+        'work_queue': args.work_queue,
+        'shard': args.shard,
+        'idle_timeout': args.idle_timeout,
+        'base_url': args.base_url,
+        'stats_file': args.stats_file,
+        'stats_interval': args.stats_interval,
+        'profile': args.profile,
+        'watch': args.watch,
+        'poll_interval': args.poll_interval,
+    }
+
+
+def run_feeds(feeds, watch=False, poll_interval=DEFAULT_POLL_INTERVAL, profile=None,
+              work_queue=None, shard=None, idle_timeout=DEFAULT_IDLE_TIMEOUT, **options):
+    """Разовый обход лент, с watch=True - непрерывное наблюдение за ними,
+    с work_queue - работа через общую очередь задач
+
+    С profile весь запуск идет под cProfile, профиль сохраняется в этот файл.
+    """
+    crawler = Crawler(feeds, **options)
+    with profiled(profile) if profile else nullcontext():
+        if work_queue:
+            shard, shard_count = map(int, shard.split('/')) if shard else (0, 1)
+            with open_work_queue(work_queue, shard=shard, shard_count=shard_count) as tasks:
+                return crawler.work(tasks, idle_timeout)
+        if watch:
+            return crawler.watch(poll_interval)
+        return crawler.run()
+
+
+def main(feed_names=('latest', 'forex'), max_articles=None, **options):
+    feeds = [FEEDS[name] for name in feed_names]
+    if max_articles:
+        feeds = [feed.replace(max_articles=max_articles) for feed in feeds]
+    return run_feeds(feeds, **options)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сбор новостей нескольких лент investing.com за один запуск")
+    parser.add_argument('--feed', action='append', choices=list(FEEDS), dest='feeds',
+                        help="лента для сбора, можно указать несколько раз (по умолчанию latest и forex)")
+    parser.add_argument('--max-articles', type=int, default=None,
+                        help="не больше стольких статей с каждой ленты за запуск")
+    add_crawler_arguments(parser)
+    args = parser.parse_args()
+    main(feed_names=args.feeds or ('latest', 'forex'), max_articles=args.max_articles, **crawler_options(args))
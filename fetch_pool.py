@@ -0,0 +1,64 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# Сколько запросов одновременно держим к одному хосту
+DEFAULT_MAX_PER_HOST = 8
+
+
+def size_connection_pool(scraper, pool_size):
+    """Подгоняем пул соединений сессии под число параллельных запросов"""
+    # Адаптеры не заменяем: у cloudscraper на https:// свой адаптер с TLS-настройками
+    for adapter in scraper.adapters.values():
+        adapter._pool_connections = pool_size
+        adapter._pool_maxsize = pool_size
+        adapter.init_poolmanager(pool_size, pool_size, block=adapter._pool_block)
+
+
+class HostLimiter:
+    """Ограничение числа одновременных запросов к каждому хосту"""
+
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST):
+        self.max_per_host = max_per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    def call(self, url, fn, *args):
+        """Вызов fn(*args) с занятым слотом хоста url"""
+        with self._semaphore(url):
+            return fn(*args)
+
+
+def map_ordered(fn, items, max_per_host=DEFAULT_MAX_PER_HOST, max_workers=None, limiter=None, url_of=None):
+    """Параллельно вызываем fn(item) и отдаем пары (item, результат) в исходном порядке
+
+    url_of(item) задает URL, по хосту которого считается лимит (по умолчанию сам item).
+    В работе держим не больше max_workers задач, поэтому входной итератор
+    читается лениво и память не растет с длиной списка.
+    """
+    max_workers = max_workers or max_per_host
+    limiter = limiter or HostLimiter(max_per_host)
+    url_of = url_of or (lambda item: item)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch') as executor:
+        try:
+            for item in items:
+                pending.append((item, executor.submit(limiter.call, url_of(item), fn, item)))
+                if len(pending) >= max_workers:
+                    item, future = pending.popleft()
+                    yield item, future.result()
+            while pending:
+                item, future = pending.popleft()
+                yield item, future.result()
+        finally:
+            # При досрочном выходе не ждем задачи, которые еще не начались
+            for _, future in pending:
+                future.cancel()
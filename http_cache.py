@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_DIR = 'http_cache'
+# Ограничения кэша: суммарный размер тел и возраст записи
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+# Заголовки, которые нужны для условных запросов и корректного .text
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class CachedSession:
+    """Кэш ответов на диске поверх сессии cloudscraper
+
+    Повторный запрос к известному URL уходит с If-None-Match/If-Modified-Since,
+    на 304 отдается сохраненное тело. В режиме replay сеть не используется:
+    всё берется из кэша, промах - ответ 504. Ответы на запросы с stream=True
+    сам get не сохраняет: тело еще не прочитано. Прочитавший его сохраняет
+    тело через store, в том числе начало страницы с partial=True - его хватит
+    для разбора и replay, но обычный запрос такую запись не ревалидирует,
+    а качает страницу целиком заново.
+    """
+
+    def __init__(self, session, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age=DEFAULT_MAX_AGE, replay=False):
+        self.session = session
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.replay = replay
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+        if not replay:
+            self.evict()
+
+    def __getattr__(self, name):
+        # Куки, заголовки, адаптеры и прочее берем у исходной сессии
+        return getattr(self.session, name)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        folder = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(folder, key + '.json'), os.path.join(folder, key + '.body')
+
+    def _entries(self):
+        """Записи кэша: (путь к метаданным, время использования, размер тела)"""
+        for folder, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.body'):
+                    body_path = os.path.join(folder, name)
+                    try:
+                        stat = os.stat(body_path)
+                    except FileNotFoundError:
+                        continue
+                    yield body_path[:-len('.body')] + '.json', stat.st_mtime, stat.st_size
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (FileNotFoundError, ValueError):
+            return None, None
+        return meta, body
+
+    def store(self, url, resp, body, encoding=None, partial=False):
+        """Сохраняем прочитанное тело ответа; partial - только начало страницы"""
+        if self.replay or getattr(resp, 'from_cache', False) or resp.status_code != 200:
+            return
+        meta_path, body_path = self._paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        meta = {
+            'url': url,
+            'status_code': resp.status_code,
+            'encoding': encoding or resp.encoding or resp.apparent_encoding,
+            'headers': {h: resp.headers[h] for h in STORED_HEADERS if h in resp.headers},
+            'stored_at': time.time(),
+            'partial': partial,
+        }
+        old_size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+        # Пишем через временный файл, чтобы параллельные читатели не видели обрывков
+        for path, data in ((body_path, body), (meta_path, json.dumps(meta).encode('utf-8'))):
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._size += len(body) - old_size
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def _touch(self, url):
+        _, body_path = self._paths(url)
+        try:
+            os.utime(body_path)
+        except FileNotFoundError:
+            pass
+
+    def _response(self, url, meta, body):
+        resp = Response()
+        resp.url = url
+        resp.status_code = meta['status_code']
+        resp.headers = CaseInsensitiveDict(meta['headers'])
+        resp.encoding = meta['encoding']
+        resp._content = body
+        # Тело уже в памяти: iter_content отдаст его, не трогая сеть
+        resp._content_consumed = True
+        resp.from_cache = True
+        return resp
+
+    def _miss(self, url):
+        resp = Response()
+        resp.url = url
+        resp.status_code = 504
+        resp.reason = 'Not in cache'
+        resp._content = b''
+        resp._content_consumed = True
+        resp.from_cache = True
+        return resp
+
+    def evict(self):
+        """Удаляем устаревшие записи, затем самые давно использованные сверх лимита"""
+        with self._lock:
+            now = time.time()
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            size = sum(entry_size for _, _, entry_size in entries)
+            for meta_path, used_at, entry_size in entries:
+                if size <= self.max_bytes and now - used_at <= self.max_age:
+                    continue
+                for path in (meta_path, meta_path[:-len('.json')] + '.body'):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                size -= entry_size
+            self._size = size
+
+    def get(self, url, **kwargs):
+        meta, body = self._load(url)
+        if self.replay:
+            if meta is None:
+                print(f"Нет в кэше: {url}")
+                return self._miss(url)
+            return self._response(url, meta, body)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if meta is not None and meta.get('partial') and not kwargs.get('stream'):
+            # Начала страницы мало тому, кому нужно все тело: качаем заново
+            meta = None
+        if meta is not None:
+            cached_headers = CaseInsensitiveDict(meta['headers'])
+            if 'ETag' in cached_headers:
+                headers['If-None-Match'] = cached_headers['ETag']
+            if 'Last-Modified' in cached_headers:
+                headers['If-Modified-Since'] = cached_headers['Last-Modified']
+
+        resp = self.session.get(url, headers=headers, **kwargs)
+        if resp.status_code == 304 and meta is not None:
+            # Соединение 304 возвращаем в пул: ответ дальше заменяется кэшированным
+            resp.close()
+            self._touch(url)
+            return self._response(url, meta, body)
+        if resp.status_code == 200 and not kwargs.get('stream'):
+            self.store(url, resp, resp.content)
+        resp.from_cache = False
+        return resp
@@ -0,0 +1,231 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Этапы конвейера, по которым собираются гистограммы задержек
+STAGES = ('listing_fetch', 'article_fetch', 'parse', 'clean', 'write', 'flush')
+# Верхние границы корзин гистограммы, секунд (как у клиента Prometheus по умолчанию)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Корзины для времени от публикации до записи: от секунд до суток
+INGEST_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0, 7200.0, 21600.0, 86400.0)
+# Префикс имен метрик в выводе для Prometheus
+METRIC_PREFIX = 'scraper_'
+
+
+class Histogram:
+    """Гистограмма задержек с фиксированными корзинами"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Оценка квантиля по верхней границе корзины"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts)),
+        }
+
+
+class Metrics:
+    """Гистограммы по этапам и счетчики с метками, общие на процесс
+
+    Потокобезопасно: этапы выполняются из потоков загрузки и лент одновременно.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._histograms = {stage: Histogram() for stage in STAGES}
+        self._labeled = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def observe(self, stage, seconds, buckets=LATENCY_BUCKETS, **labels):
+        """Замер этапа; с метками - в отдельную гистограмму на каждый набор меток"""
+        with self._lock:
+            if labels:
+                key = (stage, tuple(sorted(labels.items())))
+                if key not in self._labeled:
+                    self._labeled[key] = Histogram(buckets)
+                self._labeled[key].observe(seconds)
+                return
+            if stage not in self._histograms:
+                self._histograms[stage] = Histogram(buckets)
+            self._histograms[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Замер длительности блока кода как этапа stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'uptime': round(time.time() - self.started_at, 3),
+                'stages': {stage: hist.snapshot() for stage, hist in self._histograms.items()},
+                'histograms': [
+                    dict(hist.snapshot(), name=name, labels=dict(labels))
+                    for (name, labels), hist in sorted(self._labeled.items())
+                ],
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        """Текстовый формат экспозиции Prometheus"""
+        lines = []
+        with self._lock:
+            name = METRIC_PREFIX + 'stage_seconds'
+            lines.append(f'# TYPE {name} histogram')
+            for stage, hist in self._histograms.items():
+                cumulative = 0
+                for bound, count in zip([str(b) for b in hist.buckets] + ['+Inf'], hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {hist.sum}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {hist.count}')
+            typed = set()
+            for (stage, labels), hist in sorted(self._labeled.items()):
+                name = f'{METRIC_PREFIX}{stage}_seconds'
+                if name not in typed:
+                    lines.append(f'# TYPE {name} histogram')
+                    typed.add(name)
+                label_text = ','.join(f'{key}="{value}"' for key, value in labels)
+                cumulative = 0
+                for bound, count in zip([str(b) for b in hist.buckets] + ['+Inf'], hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label_text}}} {hist.sum}')
+                lines.append(f'{name}_count{{{label_text}}} {hist.count}')
+            for (counter, labels), value in sorted(self._counters.items()):
+                name = f'{METRIC_PREFIX}{counter}_total'
+                if name not in typed:
+                    lines.append(f'# TYPE {name} counter')
+                    typed.add(name)
+                label_text = ','.join(f'{key}="{value_}"' for key, value_ in labels)
+                lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Атомарная запись статистики: .prom/.txt - формат Prometheus, иначе JSON"""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def write_periodically(self, path, interval):
+        """Фоновая запись статистики каждые interval секунд, до stop()
+
+        Каждый вызов заводит свой флаг остановки, так что после stop() запись
+        можно запустить снова (например, следующим Crawler в том же процессе).
+        """
+        stop = self._stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.write(path)
+                except OSError as e:
+                    print(f"Не удалось записать статистику: {str(e)}")
+        threading.Thread(target=loop, name='metrics', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+
+# Общий реестр процесса: этапы конвейера пишут сюда
+metrics = Metrics()
+
+
+@contextmanager
+def profiled(path, top=30):
+    """cProfile на время блока, включая потоки, запущенные внутри него
+
+    Профиль сохраняется в path (смотреть через pstats или snakeviz),
+    самые тяжелые по cumulative функции печатаются в консоль.
+    До Python 3.12 профилировщик видит только свой поток, поэтому каждому
+    новому потоку заводится свой; с 3.12 cProfile работает через
+    sys.monitoring - один на процесс, и он сам видит все потоки.
+    """
+    profiles = []
+    lock = threading.Lock()
+
+    def start_thread_profile(frame, event, arg):
+        # Первое событие в новом потоке: заменяем хук на профилировщик этого потока
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Уже работает другой профилировщик - поток остается без своего, но не падает
+            return
+        with lock:
+            profiles.append(profile)
+
+    per_thread = sys.version_info < (3, 12)
+    main_profile = cProfile.Profile()
+    if per_thread:
+        threading.setprofile(start_thread_profile)
+    main_profile.enable()
+    try:
+        yield
+    finally:
+        main_profile.disable()
+        if per_thread:
+            threading.setprofile(None)
+        stats = pstats.Stats(main_profile)
+        with lock:
+            for profile in profiles:
+                stats.add(profile)
+        stats.dump_stats(path)
+        print(f"\nПрофиль сохранен в {path}")
+        stats.sort_stats('cumulative').print_stats(top)
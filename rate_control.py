@@ -0,0 +1,158 @@
+import threading
+import time
+
+from metrics import metrics
+
+# Стартовый темп запросов в секунду и его границы
+DEFAULT_INITIAL_RATE = 2.0
+MIN_RATE = 0.2
+MAX_RATE = 20.0
+# Ответ дольше этого считаем признаком перегрузки и слегка притормаживаем
+LATENCY_TARGET = 3.0
+# Аддитивный рост темпа на каждый здоровый ответ и мультипликативный спад при перегрузке
+INCREASE_STEP = 0.1
+DECREASE_FACTOR = 0.5
+SLOW_DECREASE_FACTOR = 0.9
+# Пауза после 429/503/проверки Cloudflare, если сервер не прислал Retry-After
+BACKOFF_PAUSE = 10.0
+# Повторные спады не чаще этого: ответы одной волны запросов приходят пачкой
+DECREASE_COOLDOWN = 2.0
+
+THROTTLE_STATUSES = (429, 503)
+# Ответы, которыми Cloudflare и сайт не пускают клиента (в отличие от 404 и 5xx самого сайта)
+REFUSAL_STATUSES = (403, 429, 503)
+
+
+def is_challenge(resp):
+    """Ответ - страница проверки Cloudflare, а не контент"""
+    if resp.headers.get('cf-mitigated') == 'challenge':
+        return True
+    if resp.status_code in (403, 503):
+        text = resp.text[:5000]
+        return 'Just a moment' in text or 'cf-chl' in text or 'challenge-form' in text
+    return False
+
+
+def is_refusal(resp):
+    """Сайт отказал клиенту (проверка Cloudflare, 403/429/503), а не страницы нет или сервер сломался"""
+    return resp.status_code in REFUSAL_STATUSES or is_challenge(resp)
+
+
+def _retry_after(resp):
+    value = resp.headers.get('Retry-After')
+    if value and value.strip().isdigit():
+        return float(value)
+    return None
+
+
+class AdaptiveRateController:
+    """AIMD-регулятор темпа и параллельности запросов к сайту
+
+    Пока ответы быстрые и здоровые, темп растет на INCREASE_STEP за ответ, а
+    допустимая параллельность - на 1 за каждые concurrency успешных ответов.
+    На 429/503 и страницу проверки Cloudflare оба параметра делятся пополам
+    и все запросы ставятся на паузу (Retry-After или BACKOFF_PAUSE).
+    """
+
+    def __init__(self, max_concurrency, initial_rate=DEFAULT_INITIAL_RATE,
+                 min_rate=MIN_RATE, max_rate=MAX_RATE, latency_target=LATENCY_TARGET):
+        self.max_concurrency = max_concurrency
+        self.concurrency = max(1, max_concurrency // 2)
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.latency_target = latency_target
+        self.counters = {'ok': 0, 'slow': 0, 'throttled': 0, 'errors': 0}
+        self._in_flight = 0
+        self._next_start = 0.0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    @property
+    def current_rate(self):
+        return self.rate
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counters, rate=round(self.rate, 2), concurrency=self.concurrency,
+                        in_flight=self._in_flight)
+
+    def acquire(self):
+        """Ждем свободный слот и очередь по темпу"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self._paused_until, self._next_start) - now
+                if self._in_flight < self.concurrency and wait <= 0:
+                    self._in_flight += 1
+                    self._next_start = max(now, self._next_start) + 1.0 / self.rate
+                    return
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def _decrease(self, factor, now):
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * factor)
+        self.concurrency = max(1, int(self.concurrency * factor))
+        self._successes = 0
+
+    def release(self, status, latency, challenged=False, retry_after=None):
+        """Учитываем результат запроса (status=None - сетевая ошибка)"""
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if challenged or status in THROTTLE_STATUSES:
+                self.counters['throttled'] += 1
+                self._decrease(DECREASE_FACTOR, now)
+                self._paused_until = max(self._paused_until, now + (retry_after or BACKOFF_PAUSE))
+            elif status is None:
+                self.counters['errors'] += 1
+                self._decrease(SLOW_DECREASE_FACTOR, now)
+            elif latency > self.latency_target:
+                self.counters['slow'] += 1
+                self._decrease(SLOW_DECREASE_FACTOR, now)
+            else:
+                self.counters['ok'] += 1
+                self.rate = min(self.max_rate, self.rate + INCREASE_STEP)
+                self._successes += 1
+                if self._successes >= self.concurrency:
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+class RateLimitedSession:
+    """Сессия, пропускающая GET-запросы через AdaptiveRateController
+
+    Запрос, получивший 429/503 или проверку Cloudflare, повторяется
+    до retries раз после паузы регулятора.
+    """
+
+    def __init__(self, session, controller, retries=2):
+        self.session = session
+        self.controller = controller
+        self.retries = retries
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def get(self, url, **kwargs):
+        for attempt in range(self.retries + 1):
+            self.controller.acquire()
+            start = time.monotonic()
+            try:
+                resp = self.session.get(url, **kwargs)
+            except Exception:
+                self.controller.release(None, time.monotonic() - start)
+                raise
+            challenged = is_challenge(resp)
+            self.controller.release(resp.status_code, time.monotonic() - start,
+                                    challenged=challenged, retry_after=_retry_after(resp))
+            if not (challenged or resp.status_code in THROTTLE_STATUSES):
+                return resp
+            metrics.inc('throttled', status='challenge' if challenged else resp.status_code)
+            print(f"Сайт просит притормозить (HTTP {resp.status_code}), темп: {self.controller.current_rate:.2f} запр/с")
+        return resp
@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+import time
+
+# Общий индекс для всех лент: статья, собранная одной лентой, не качается повторно другой
+DEFAULT_INDEX_PATH = 'seen_articles.db'
+
+
+class SeenIndex:
+    """Постоянный индекс уже собранных статей (SQLite, ключ - URL статьи)"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS seen ('
+                ' url TEXT PRIMARY KEY,'
+                ' published TEXT,'
+                ' seen_at REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS watermarks ('
+                ' feed TEXT PRIMARY KEY,'
+                ' published_at REAL NOT NULL,'
+                ' updated_at REAL NOT NULL)'
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, url):
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM seen WHERE url = ?', (url,)).fetchone()
+        return row is not None
+
+    def known(self, urls):
+        """Подмножество urls, которые уже есть в индексе"""
+        urls = list(urls)
+        found = set()
+        with self._lock:
+            # Ограничение SQLite на число параметров в запросе
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows = self._conn.execute(
+                    f'SELECT url FROM seen WHERE url IN ({",".join("?" * len(chunk))})', chunk
+                )
+                found.update(url for (url,) in rows)
+        return found
+
+    def add(self, url, published=None):
+        """Отмечаем статью как собранную"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO seen (url, published, seen_at) VALUES (?, ?, ?)',
+                (url, published, time.time())
+            )
+
+    def add_many(self, items):
+        """Отмечаем пачку статей (url, published) одной транзакцией"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO seen (url, published, seen_at) VALUES (?, ?, ?)',
+                [(url, published, now) for url, published in items]
+            )
+
+    def watermark(self, feed):
+        """Время публикации, до которого лента собрана целиком (timestamp), или None"""
+        with self._lock:
+            row = self._conn.execute('SELECT published_at FROM watermarks WHERE feed = ?', (feed,)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, feed, published_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO watermarks (feed, published_at, updated_at) VALUES (?, ?, ?)',
+                (feed, published_at, time.time())
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
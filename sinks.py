@@ -0,0 +1,258 @@
+import csv
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+
+from metrics import metrics
+
+# Сбрасываем буфер на диск каждые N строк или T секунд - что наступит раньше
+DEFAULT_FLUSH_ROWS = 50
+DEFAULT_FLUSH_INTERVAL = 5.0
+# Parquet пишется файлом на пачку строк: мелкие пачки портят сжатие и скорость чтения
+PARQUET_ROW_GROUP_ROWS = 1000
+
+SINK_FORMATS = ('csv', 'jsonl', 'jsonl.gz', 'jsonl.zst', 'parquet')
+
+
+def format_related(related):
+    """Связанные инструменты одной строкой, как в CSV"""
+    return '; '.join(f'{r["ticker"]} ({r["url"]})' for r in related)
+
+
+def detect_format(path):
+    """Формат вывода по расширению файла"""
+    for fmt in sorted(SINK_FORMATS, key=len, reverse=True):
+        if path.endswith('.' + fmt):
+            return fmt
+    raise ValueError(f"Не удалось определить формат вывода по имени файла: {path}")
+
+
+def open_sink(path, fieldnames, fmt=None, **options):
+    """Приемник строк нужного формата (по умолчанию - по расширению path)"""
+    fmt = fmt or detect_format(path)
+    if fmt == 'csv':
+        return CsvSink(path, fieldnames, **options)
+    if fmt in ('jsonl', 'jsonl.gz', 'jsonl.zst'):
+        return JsonlSink(path, fieldnames, compression=fmt[len('jsonl.'):] or None, **options)
+    if fmt == 'parquet':
+        return ParquetSink(path, fieldnames, **options)
+    raise ValueError(f"Неизвестный формат вывода: {fmt}")
+
+
+class Sink:
+    """Приемник строк статей: буфер, сброс каждые N строк или T секунд
+
+    Строки приходят со структурированным полем related (список словарей
+    ticker/url), каждый формат сам решает, как его хранить.
+    С fsync=True после каждого сброса данные принудительно пишутся на диск.
+    on_flush(rows) вызывается после того, как строки оказались в файле.
+    Закрывать через with или close() - оставшийся буфер при этом сбрасывается,
+    в том числе при прерывании по Ctrl+C.
+    """
+
+    def __init__(self, path, fieldnames, flush_rows=DEFAULT_FLUSH_ROWS,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, fsync=False, on_flush=None):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.on_flush = on_flush
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._last_flush = time.monotonic()
+
+        if flush_interval:
+            # Фоновый сброс, чтобы строки не залеживались в буфере при редких записях
+            self._flusher = threading.Thread(target=self._flush_periodically,
+                                             name=type(self).__name__, daemon=True)
+            self._flusher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, row):
+        with self._lock:
+            self._buffer.append(row)
+            if (len(self._buffer) >= self.flush_rows
+                    or (self.flush_interval
+                        and time.monotonic() - self._last_flush >= self.flush_interval)):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        rows, self._buffer = self._buffer, []
+        if rows:
+            with metrics.timer('flush'):
+                self._write_rows(rows)
+                self._sync()
+        self._last_flush = time.monotonic()
+        if rows and self.on_flush:
+            self.on_flush(rows)
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if self._buffer and not self._closed.is_set():
+                    self._flush_locked()
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        with self._lock:
+            self._flush_locked()
+            self._close_output()
+
+    def _write_rows(self, rows):
+        raise NotImplementedError
+
+    def _sync(self):
+        pass
+
+    def _close_output(self):
+        pass
+
+
+class CsvSink(Sink):
+    """CSV с дозаписью; related сворачивается в строку 'TICKER (url); ...'"""
+
+    def __init__(self, path, fieldnames, **options):
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        if write_header:
+            self._writer.writeheader()
+        super().__init__(path, fieldnames, **options)
+
+    def _write_rows(self, rows):
+        for row in rows:
+            if 'related' in row and not isinstance(row['related'], str):
+                row = dict(row, related=format_related(row['related']))
+            self._writer.writerow(row)
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _close_output(self):
+        self._file.close()
+
+
+class JsonlSink(Sink):
+    """JSON Lines с дозаписью, без сжатия или в gzip/zstd; related остается списком
+
+    Дозапись в сжатый файл добавляет новый gzip-member/zstd-фрейм,
+    такие файлы читаются стандартными утилитами целиком.
+    """
+
+    def __init__(self, path, fieldnames, compression=None, **options):
+        self.compression = compression
+        self._raw = open(path, 'ab')
+        if compression in ('gz', 'gzip'):
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='ab')
+        elif compression in ('zst', 'zstd'):
+            try:
+                import zstandard
+            except ImportError:
+                self._raw.close()
+                raise ImportError("Для вывода в .jsonl.zst нужен пакет zstandard (pip install zstandard)")
+            self._zstd = zstandard
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+        super().__init__(path, fieldnames, **options)
+
+    def _write_rows(self, rows):
+        lines = ''.join(
+            json.dumps({field: row.get(field) for field in self.fieldnames}, ensure_ascii=False) + '\n'
+            for row in rows
+        )
+        self._stream.write(lines.encode('utf-8'))
+
+    def _sync(self):
+        # Сбрасываем сжатый поток до границы блока, чтобы записанное читалось сразу
+        if self.compression in ('zst', 'zstd'):
+            self._stream.flush(self._zstd.FLUSH_BLOCK)
+        else:
+            self._stream.flush()
+        self._raw.flush()
+        if self.fsync:
+            os.fsync(self._raw.fileno())
+
+    def _close_output(self):
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+
+
+class ParquetSink(Sink):
+    """Набор Parquet: каталог path, каждая пачка строк - отдельный файл в нем
+
+    Файл Parquet читается только после записи футера, поэтому на каждый
+    сброс пишется свой законченный файл: записанное сразу читается целым
+    каталогом (pyarrow.parquet.read_table(path), pandas.read_parquet(path)),
+    в том числе во время --watch, а при падении теряется только буфер.
+    Файл появляется в каталоге переименованием, так что читатель не увидит
+    его недописанным; следующие запуски дописывают каталог новыми файлами.
+    """
+
+    def __init__(self, path, fieldnames, flush_rows=PARQUET_ROW_GROUP_ROWS, flush_interval=None,
+                 compression='zstd', **options):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Для вывода в Parquet нужен пакет pyarrow (pip install pyarrow)")
+        if os.path.isfile(path):
+            # Одиночный файл прежнего формата не трогаем
+            root, ext = os.path.splitext(path)
+            path = f"{root}.{time.strftime('%Y%m%d-%H%M%S')}{ext}"
+            print(f"Parquet теперь пишется каталогом, а {root}{ext} - файл; пишем в новый каталог: {path}")
+        os.makedirs(path, exist_ok=True)
+        self._pa = pyarrow
+        self._parquet = pyarrow.parquet
+        self.compression = compression
+        self.schema = pyarrow.schema([
+            (field, pyarrow.list_(pyarrow.struct([('ticker', pyarrow.string()), ('url', pyarrow.string())])))
+            if field == 'related' else (field, pyarrow.string())
+            for field in fieldnames
+        ])
+        # Процессы с общей очередью и повторные запуски пишут в один каталог - имена не должны совпадать
+        self._prefix = f"part-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self._parts = 0
+        super().__init__(path, fieldnames, flush_rows=flush_rows, flush_interval=flush_interval, **options)
+
+    def _write_rows(self, rows):
+        columns = {field: [row.get(field) for row in rows] for field in self.fieldnames}
+        table = self._pa.Table.from_pydict(columns, schema=self.schema)
+        name = f"{self._prefix}-{self._parts:05d}.parquet"
+        # Файлы с точкой в начале имени pyarrow и pandas при чтении каталога пропускают
+        tmp_path = os.path.join(self.path, f".{name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            self._parquet.write_table(table, f, compression=self.compression)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.path, name))
+        self._parts += 1
+
+    def _sync(self):
+        if self.fsync:
+            # Переименование тоже должно дойти до диска
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
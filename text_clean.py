@@ -0,0 +1,85 @@
+# Битая кодировка: 'вЂ' (в любом регистре) и следующие за ним 1-3 символа, кроме перевода строки.
+# Регистры - как у re.IGNORECASE: с 'в' совпадает и U+1C80 (CYRILLIC SMALL LETTER ROUNDED VE)
+_MOJIBAKE_FIRST = 'вВ\u1c80'
+_MOJIBAKE_SECOND = ('Ђ', 'ђ')
+_MOJIBAKE_TAIL = 3
+
+# Таблица замен типографских символов
+REPLACEMENTS = {
+    '’': "'",
+    '‘': "'",
+    '–': '-',
+    '—': '-',
+    '…': '...',
+    '•': '-',
+    '\xa0': ' ',
+}
+
+
+def _strip_mojibake(text):
+    """Аналог re.sub(r'вЂ.{0,3}', '', text, flags=re.IGNORECASE) через str.find"""
+    starts = []
+    for second in _MOJIBAKE_SECOND:
+        pos = text.find(second, 1)
+        while pos != -1:
+            if text[pos - 1] in _MOJIBAKE_FIRST:
+                starts.append(pos - 1)
+            pos = text.find(second, pos + 1)
+    if not starts:
+        return text
+    parts = []
+    last_end = 0
+    for start in sorted(starts):
+        # Совпадения не пересекаются и ищутся слева направо, как у re.sub
+        if start < last_end:
+            continue
+        end = start + 2
+        limit = min(end + _MOJIBAKE_TAIL, len(text))
+        while end < limit and text[end] != '\n':
+            end += 1
+        parts.append(text[last_end:start])
+        last_end = end
+    parts.append(text[last_end:])
+    return ''.join(parts)
+
+
+def clean_text(text):
+    """Нормализация текста статьи по таблице замен
+
+    Каждый символ из REPLACEMENTS заменяется, только если он есть в тексте,
+    а ASCII-текст возвращается сразу: в нем заменять нечего.
+    """
+    if not text:
+        return ''
+    if text.isascii():
+        return text
+    text = _strip_mojibake(text)
+    for char, replacement in REPLACEMENTS.items():
+        if char in text:
+            text = text.replace(char, replacement)
+    # Одиночные суррогаты не кодируются в UTF-8 - выбрасываем их
+    try:
+        text.encode('utf-8')
+    except UnicodeEncodeError:
+        text = text.encode('utf-8', errors='ignore').decode('utf-8')
+    return text
+
+
+def clean_row(row, fields):
+    """Копия строки с очищенными полями fields; в related чистятся ticker и url"""
+    cleaned = dict(row)
+    for field in fields:
+        value = row.get(field)
+        if field == 'related' and isinstance(value, list):
+            cleaned[field] = [
+                {'ticker': clean_text(r['ticker']), 'url': clean_text(r['url'])}
+                for r in value
+            ]
+        else:
+            cleaned[field] = clean_text(value)
+    return cleaned
+
+
+def clean_rows(rows, fields):
+    """Пакетная очистка списка строк"""
+    return [clean_row(row, fields) for row in rows]
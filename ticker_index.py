@@ -0,0 +1,198 @@
+"""Обратный индекс: инструмент из related -> статьи со временем публикации
+
+Индекс пополняется crawler.py (--ticker-index) по мере записи статей,
+здесь же - запросы к нему из командной строки:
+
+    python ticker_index.py EUR/USD --hours 6
+    python ticker_index.py --url /currencies/eur-usd --since "2025-01-01 00:00:00"
+    python ticker_index.py --instruments
+"""
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+DEFAULT_TICKER_INDEX_PATH = 'ticker_index.db'
+# Формат дат в выводе и в --since/--until (UTC, как даты листинга)
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class TickerIndex:
+    """Постоянный индекс инструмент -> статьи (SQLite)
+
+    Связи лежат в таблице без rowid, упорядоченной по (инструмент, время
+    публикации, статья): выборка статей по инструменту за период - один
+    проход по диапазону индекса. Статьи и инструменты хранятся один раз,
+    связи ссылаются на них целыми id.
+    """
+
+    def __init__(self, path=DEFAULT_TICKER_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS instruments ('
+                ' id INTEGER PRIMARY KEY,'
+                ' ticker TEXT NOT NULL,'
+                ' url TEXT NOT NULL,'
+                ' UNIQUE (ticker, url))'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS instruments_url ON instruments (url)')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS articles ('
+                ' id INTEGER PRIMARY KEY,'
+                ' link TEXT NOT NULL UNIQUE,'
+                ' title TEXT,'
+                ' published_at INTEGER NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS postings ('
+                ' instrument_id INTEGER NOT NULL,'
+                ' published_at INTEGER NOT NULL,'
+                ' article_id INTEGER NOT NULL,'
+                ' PRIMARY KEY (instrument_id, published_at, article_id)'
+                ') WITHOUT ROWID'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS postings_article ON postings (article_id)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _instrument_id(self, ticker, url):
+        self._conn.execute('INSERT OR IGNORE INTO instruments (ticker, url) VALUES (?, ?)', (ticker, url))
+        return self._conn.execute(
+            'SELECT id FROM instruments WHERE ticker = ? AND url = ?', (ticker, url)
+        ).fetchone()[0]
+
+    def add_many(self, items):
+        """Добавляем статьи (link, title, published_at, related) одной транзакцией
+
+        published_at - timestamp публикации (если неизвестен, берется текущее время),
+        related - список словарей ticker/url. Повторно добавленная статья (новая
+        ревизия) заменяет свои прежние связи.
+        """
+        now = int(time.time())
+        with self._lock, self._conn:
+            for link, title, published_at, related in items:
+                published_at = int(published_at) if published_at is not None else now
+                self._conn.execute(
+                    'INSERT INTO articles (link, title, published_at) VALUES (?, ?, ?)'
+                    ' ON CONFLICT (link) DO UPDATE SET title = excluded.title, published_at = excluded.published_at',
+                    (link, title, published_at)
+                )
+                article_id = self._conn.execute('SELECT id FROM articles WHERE link = ?', (link,)).fetchone()[0]
+                self._conn.execute('DELETE FROM postings WHERE article_id = ?', (article_id,))
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO postings (instrument_id, published_at, article_id) VALUES (?, ?, ?)',
+                    [(self._instrument_id(r['ticker'], r['url']), published_at, article_id)
+                     for r in related or [] if r.get('ticker') and r.get('url')]
+                )
+
+    def query(self, ticker=None, url=None, since=None, until=None, limit=None):
+        """Статьи по инструменту (тикеру и/или URL) за период, новые первыми
+
+        since/until - timestamp, границы включительно. Возвращает словари
+        link, title, published_at, ticker, instrument_url.
+        """
+        where, params = [], []
+        if ticker is not None:
+            where.append('i.ticker = ?')
+            params.append(ticker)
+        if url is not None:
+            where.append('i.url = ?')
+            params.append(url)
+        if not where:
+            raise ValueError("Нужен тикер или URL инструмента")
+        if since is not None:
+            where.append('p.published_at >= ?')
+            params.append(int(since))
+        if until is not None:
+            where.append('p.published_at <= ?')
+            params.append(int(until))
+        sql = (
+            'SELECT a.link, a.title, p.published_at, i.ticker, i.url FROM instruments i'
+            ' JOIN postings p ON p.instrument_id = i.id JOIN articles a ON a.id = p.article_id'
+            f' WHERE {" AND ".join(where)} ORDER BY p.published_at DESC, a.id DESC'
+        )
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {'link': link, 'title': title, 'published_at': published_at, 'ticker': ticker_, 'instrument_url': url_}
+            for link, title, published_at, ticker_, url_ in rows
+        ]
+
+    def instruments(self):
+        """Все инструменты с числом статей и временем последней: (ticker, url, статей, последняя)"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT i.ticker, i.url, COUNT(*), MAX(p.published_at) FROM instruments i'
+                ' JOIN postings p ON p.instrument_id = i.id GROUP BY i.id ORDER BY COUNT(*) DESC'
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def format_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(DATETIME_FORMAT)
+
+
+def parse_timestamp(value):
+    return datetime.strptime(value, DATETIME_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Статьи по инструменту из индекса related")
+    parser.add_argument('ticker', nargs='?', help="тикер инструмента, например EUR/USD")
+    parser.add_argument('--url', help="URL инструмента, например /currencies/eur-usd")
+    parser.add_argument('--hours', type=float, help="только статьи за последние столько часов")
+    parser.add_argument('--since', help=f"не раньше этого времени UTC ({DATETIME_FORMAT})")
+    parser.add_argument('--until', help=f"не позже этого времени UTC ({DATETIME_FORMAT})")
+    parser.add_argument('--limit', type=int, default=None, help="не больше стольких статей")
+    parser.add_argument('--instruments', action='store_true', help="список инструментов с числом статей")
+    parser.add_argument('--json', action='store_true', help="вывод в JSON")
+    parser.add_argument('--index', default=DEFAULT_TICKER_INDEX_PATH, help="файл индекса")
+    args = parser.parse_args()
+
+    with TickerIndex(args.index) as index:
+        if args.instruments:
+            rows = index.instruments()
+            if args.json:
+                print(json.dumps([
+                    {'ticker': ticker, 'instrument_url': url, 'articles': count, 'latest': format_timestamp(latest)}
+                    for ticker, url, count, latest in rows
+                ], ensure_ascii=False, indent=2))
+            else:
+                for ticker, url, count, latest in rows:
+                    print(f"{ticker:20} {count:6}  {format_timestamp(latest)}  {url}")
+            return
+        if not args.ticker and not args.url:
+            parser.error("укажите тикер или --url")
+        since = parse_timestamp(args.since) if args.since else None
+        if args.hours is not None:
+            since = max(since or 0, time.time() - args.hours * 3600)
+        until = parse_timestamp(args.until) if args.until else None
+        articles = index.query(args.ticker, args.url, since, until, args.limit)
+        if args.json:
+            for article in articles:
+                article['published_at'] = format_timestamp(article['published_at'])
+            print(json.dumps(articles, ensure_ascii=False, indent=2))
+            return
+        for article in articles:
+            print(f"{format_timestamp(article['published_at'])}  {article['ticker']:12} "
+                  f"{article['title']}\n    {article['link']}")
+        print(f"Статей: {len(articles)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+DEFAULT_QUEUE_PATH = 'work_queue.db'
+# Сколько секунд задача принадлежит взявшему ее процессу; не успел - ее возьмет другой
+DEFAULT_LEASE_SECONDS = 300
+# После стольких неудачных попыток задача считается проваленной
+MAX_ATTEMPTS = 3
+
+
+class Task:
+    """Задача из очереди: страница листинга или статья"""
+
+    def __init__(self, id, kind, url, feed, payload, attempts):
+        self.id = id
+        self.kind = kind
+        self.url = url
+        self.feed = feed
+        self.payload = payload
+        self.attempts = attempts
+
+
+def open_work_queue(location, **options):
+    """Очередь по адресу: путь к файлу или sqlite:///путь
+
+    SQLite-очередь - для процессов одной машины: журнал WAL не работает
+    через сетевые файловые системы. Для нескольких машин нужен другой брокер.
+    Другой брокер (Redis, RabbitMQ и т.п.) подключается здесь: ему достаточно
+    тех же методов put_many, lease, complete, fail, renew, pending и stats
+    и атрибута lease_seconds.
+    """
+    if location.startswith('sqlite:///'):
+        location = location[len('sqlite:///'):]
+    elif '://' in location:
+        raise ValueError(f"Неизвестный тип очереди: {location}")
+    return WorkQueue(location, **options)
+
+
+class WorkQueue:
+    """Постоянная очередь задач в SQLite с арендой, общая для процессов одной машины
+
+    Задача (вид, URL) попадает в очередь один раз, поэтому процессы, делящие
+    очередь, не делают одну работу дважды. Взятая задача арендуется на
+    lease_seconds: если процесс упал, аренда истекает и задачу берет другой.
+    shard/shard_count делят задачи статей между процессами по хэшу URL.
+    Листинги в шарды не делятся: их берет любой процесс, иначе процесс,
+    запущенный без пары, ждал бы страницу листинга из чужого шарда.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 shard=0, shard_count=1, owner=None):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.shard = shard
+        self.shard_count = shard_count
+        self.owner = owner or uuid.uuid4().hex
+        self._lock = threading.Lock()
+        # timeout: ждем, пока другой процесс отпустит базу, а не падаем сразу
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS tasks ('
+            ' id INTEGER PRIMARY KEY,'
+            ' kind TEXT NOT NULL,'
+            ' url TEXT NOT NULL,'
+            ' feed TEXT,'
+            ' payload TEXT,'
+            ' shard INTEGER NOT NULL,'
+            " state TEXT NOT NULL DEFAULT 'pending',"
+            ' owner TEXT,'
+            ' lease_until REAL,'
+            ' attempts INTEGER NOT NULL DEFAULT 0,'
+            ' updated_at REAL NOT NULL,'
+            ' UNIQUE (kind, url))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, lease_until)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def put(self, kind, url, feed=None, payload=None):
+        """Добавляем задачу; False, если она уже была в очереди"""
+        return self.put_many([(kind, url, feed, payload)]) == 1
+
+    def put_many(self, tasks):
+        """Добавляем пачку задач (kind, url, feed, payload), возвращаем число новых"""
+        rows = [
+            (kind, url, feed, json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+             zlib.crc32(url.encode('utf-8')), time.time())
+            for kind, url, feed, payload in tasks
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO tasks (kind, url, feed, payload, shard, updated_at)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)', rows
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            return self._conn.total_changes - before
+
+    def lease(self, limit=1, kinds=None, feeds=None):
+        """Берем до limit свободных задач (или с истекшей арендой) в аренду"""
+        now = time.time()
+        where = ["(state = 'pending' OR (state = 'leased' AND lease_until < ?))",
+                 "(kind = 'listing' OR shard % ? = ?)"]
+        params = [now, self.shard_count, self.shard]
+        if kinds:
+            where.append(f'kind IN ({",".join("?" * len(kinds))})')
+            params.extend(kinds)
+        if feeds:
+            where.append(f'feed IN ({",".join("?" * len(feeds))})')
+            params.extend(feeds)
+        with self._lock:
+            # BEGIN IMMEDIATE: выборка и захват атомарны относительно других процессов
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._conn.execute(
+                    f'SELECT id, kind, url, feed, payload, attempts FROM tasks WHERE {" AND ".join(where)}'
+                    ' ORDER BY id LIMIT ?', params + [limit]
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE tasks SET state = 'leased', owner = ?, lease_until = ?, updated_at = ? WHERE id = ?",
+                    [(self.owner, now + self.lease_seconds, now, row[0]) for row in rows]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return [
+            Task(id, kind, url, feed, json.loads(payload) if payload else None, attempts)
+            for id, kind, url, feed, payload, attempts in rows
+        ]
+
+    def _update(self, sql, params):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(sql, params)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def complete(self, task_ids):
+        """Задачи выполнены"""
+        self._update(
+            "UPDATE tasks SET state = 'done', owner = NULL, lease_until = NULL, updated_at = ?"
+            ' WHERE id = ? AND owner = ?',
+            [(time.time(), task_id, self.owner) for task_id in task_ids]
+        )
+
+    def fail(self, task_ids):
+        """Попытка не удалась: задача вернется в очередь, пока не кончатся попытки"""
+        self._update(
+            "UPDATE tasks SET attempts = attempts + 1, owner = NULL, lease_until = NULL, updated_at = ?,"
+            " state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END"
+            ' WHERE id = ? AND owner = ?',
+            [(time.time(), MAX_ATTEMPTS, task_id, self.owner) for task_id in task_ids]
+        )
+
+    def renew(self, task_ids):
+        """Продлеваем аренду задач, которые еще в работе"""
+        now = time.time()
+        self._update(
+            "UPDATE tasks SET lease_until = ?, updated_at = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+            [(now + self.lease_seconds, now, task_id, self.owner) for task_id in task_ids]
+        )
+
+    def pending(self, feeds=None):
+        """Сколько задач всей очереди еще не выполнено (ждут или в аренде)
+
+        Считаются все шарды: листинг из чужого шарда еще может добавить статьи в наш.
+        """
+        where = "state IN ('pending', 'leased')"
+        params = []
+        if feeds:
+            where += f' AND feed IN ({",".join("?" * len(feeds))})'
+            params.extend(feeds)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM tasks WHERE {where}', params).fetchone()[0]
+
+    def stats(self):
+        """Число задач по виду и состоянию"""
+        with self._lock:
+            rows = self._conn.execute('SELECT kind, state, COUNT(*) FROM tasks GROUP BY kind, state').fetchall()
+        return {f'{kind}/{state}': count for kind, state, count in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()